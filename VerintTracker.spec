@@ -23,6 +23,7 @@ datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 # Explicitly add matplotlib to hiddenimports (collect_all failed previously)
 hiddenimports += [
     'keyboard',
+    'pynput',
     'matplotlib',
     'matplotlib.pyplot',
     'matplotlib.backends',
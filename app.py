@@ -1,4 +1,6 @@
 import customtkinter as ctk
+import functools
+import multiprocessing
 import queue
 import winsound
 import json
@@ -14,6 +16,8 @@ from datetime import datetime, timedelta
 # Core Logic
 from src.core.stats_manager import StatsManager
 from src.core.input_monitor import InputMonitor
+from src.core.input_process import ProcessInputMonitor
+from src.core.input_sources import create_input_source
 from src.core.worker import TrackerWorker
 
 # UI Components
@@ -81,9 +85,22 @@ class ScheduleApp(ctk.CTk):
         except Exception as e:
             print(f"Failed to load icon: {e}")
             
+        # Load config for notifications
+        self.config = {}
+        self.load_config()
+        
         # Initialize Core Managers
-        self.stats_manager = StatsManager(filepath=self.stats_path)
-        self.input_monitor = InputMonitor(self.stats_manager)
+        self.stats_manager = StatsManager(filepath=self.stats_path,
+                                          backend=self.config.get("stats_backend", "json"),
+                                          flush_latency=float(self.config.get("stats_flush_latency", 0.5)),
+                                          retention_days=int(self.config.get("stats_retention_days", 0)))
+        make_source = functools.partial(create_input_source, self.config.get("input_backend", "poll"),
+                                        idle_after=float(self.config.get("input_idle_after", 30)))
+        if self.config.get("input_process", False):
+            # Sample input in a child process, away from the UI's GIL
+            self.input_monitor = ProcessInputMonitor(self.stats_manager, make_source)
+        else:
+            self.input_monitor = InputMonitor(self.stats_manager, make_source())
         
         # Setup Worker Queues
         self.command_queue = queue.Queue()
@@ -94,10 +111,6 @@ class ScheduleApp(ctk.CTk):
         self.notified_activities = set()
         self.refresh_timer = None
         
-        # Load config for notifications
-        self.config = {}
-        self.load_config()
-        
         self.setup_ui()
         
         # Only start worker if config exists. 
@@ -400,6 +413,7 @@ class ScheduleApp(ctk.CTk):
                     
                 except Exception as e:
                     print(f"Error calculating shift end: {e}")
+        self.stats_manager.pace.set_shift_end(shift_end)
 
         if next_activity:
             self.next_activity_label.configure(text=f"Next: {next_activity['activity']}")
@@ -439,6 +453,7 @@ class ScheduleApp(ctk.CTk):
         self.status_bar.configure(text="Stopping tracker...")
         try:
             self.input_monitor.stop()
+            self.stats_manager.close()
             self.command_queue.put(("stop", None))
         except:
             pass
@@ -504,6 +519,8 @@ class ScheduleApp(ctk.CTk):
                 pass
 
 if __name__ == "__main__":
+    # Needed by the input sampler process in the PyInstaller build
+    multiprocessing.freeze_support()
     app = ScheduleApp()
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
     app.mainloop()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Ticket memory benchmark.
+
+Compares the memory held by the legacy list of {"timestamp": str,
+"has_reply": bool} dicts with the columnar TicketIndex (array('d') of
+epoch seconds plus a has_reply bytearray) for the same tickets.
+
+Usage: python scripts/benchmark_memory.py [--sizes 100000,1000000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.ticket_index import TicketIndex
+
+
+def ticket_times(count, tickets_per_day=40):
+    """Epoch seconds of count tickets ending now, oldest first."""
+    now = datetime.now()
+    start = now - timedelta(days=count // tickets_per_day + 1)
+    step = (now - start).total_seconds() / count
+    base = start.timestamp()
+    return [base + step * i for i in range(count)]
+
+
+def measure(build):
+    """Return (bytes still allocated by build's result, result)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def build_dicts(times):
+    return [{"timestamp": datetime.fromtimestamp(ts).isoformat(), "has_reply": i % 7 != 0}
+            for i, ts in enumerate(times)]
+
+
+def build_index(times):
+    index = TicketIndex()
+    for i, ts in enumerate(times):
+        index.add(ts, i % 7 != 0)
+    return index
+
+
+def run(sizes):
+    print(f"{'tickets':>10} {'dicts MB':>9} {'B/ticket':>9} {'columns MB':>11} {'B/ticket':>9} {'ratio':>6}")
+    for size in sizes:
+        times = ticket_times(size)
+        dict_bytes, dicts = measure(lambda: build_dicts(times))
+        del dicts
+        index_bytes, index = measure(lambda: build_index(times))
+        del index
+        print(f"{size:>10} {dict_bytes / 1e6:>9.1f} {dict_bytes / size:>9.0f} "
+              f"{index_bytes / 1e6:>11.1f} {index_bytes / size:>9.1f} {dict_bytes / index_bytes:>6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000",
+                        help="Comma separated history sizes (tickets)")
+    args = parser.parse_args()
+    run([int(s) for s in args.sizes.split(",")])
+
+
+if __name__ == "__main__":
+    main()
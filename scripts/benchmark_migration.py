@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Stats schema migration check and startup benchmark.
+
+Writes legacy (schema version 0) ticket_stats.json files, checks that the
+one-time migration keeps every ticket and stamps the current schema
+version, then times the migrating startup against a normal startup of the
+already migrated file.
+
+Usage: python scripts/benchmark_migration.py [--tickets 200000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.stats_store import JsonStatsStore, SCHEMA_VERSION
+
+
+def write_legacy(path, ticket_count, tickets_per_day=40, version=0):
+    """Write a pre-versioning snapshot; version 0 mixes bare timestamp strings in."""
+    now = datetime.now()
+    start = now - timedelta(days=ticket_count // tickets_per_day + 1)
+    step = (now - start) / ticket_count
+    tickets = []
+    for i in range(ticket_count):
+        ts = (start + step * i).isoformat()
+        if version == 0 and i % 5 == 0:
+            tickets.append(ts)
+        else:
+            tickets.append({"timestamp": ts, "has_reply": i % 7 != 0})
+    data = {"tickets": tickets, "activity": {}}
+    if version >= 1:
+        data["daily"] = {}
+        for t in tickets:
+            day = data["daily"].setdefault(t["timestamp"][:10], {"replies": 0, "no_replies": 0})
+            day["replies" if t["has_reply"] else "no_replies"] += 1
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    return tickets
+
+
+def check(tmp):
+    """Migration checks; raises AssertionError on the first failure."""
+    epoch = datetime(2000, 1, 1)
+    for version in (0, 1):
+        path = os.path.join(tmp, f"check_v{version}.json")
+        tickets = write_legacy(path, 5000, version=version)
+        replies = sum(1 for t in tickets if isinstance(t, str) or t["has_reply"])
+
+        store = JsonStatsStore(path)
+        assert store.data["schema_version"] == SCHEMA_VERSION
+        assert "tickets" not in store.data
+        assert store.count_tickets(epoch, None, replies_only=False) == len(tickets)
+        assert store.count_tickets(epoch) == replies
+        assert sum(d["replies"] for d in store.data["daily"].values()) == replies
+
+        with open(path) as f:
+            on_disk = json.load(f)
+        assert on_disk["schema_version"] == SCHEMA_VERSION and "tickets" not in on_disk
+
+        # Second open must not migrate (and so must not rewrite the snapshot)
+        mtime = os.stat(path).st_mtime_ns
+        store = JsonStatsStore(path)
+        assert os.stat(path).st_mtime_ns == mtime
+        assert store.count_tickets(epoch, None, replies_only=False) == len(tickets)
+        assert [t["timestamp"] for t in store.tickets] == \
+            sorted(t if isinstance(t, str) else t["timestamp"] for t in tickets)
+    print("migration checks passed")
+
+
+def run(ticket_count):
+    with tempfile.TemporaryDirectory() as tmp:
+        check(tmp)
+
+        path = os.path.join(tmp, "ticket_stats.json")
+        write_legacy(path, ticket_count)
+
+        start = time.perf_counter()
+        JsonStatsStore(path)
+        migrate = time.perf_counter() - start
+
+        start = time.perf_counter()
+        JsonStatsStore(path)
+        startup = time.perf_counter() - start
+
+        print(f"{ticket_count} legacy tickets: first startup (migration) {migrate:.2f}s, "
+              f"later startups {startup * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=200000, help="Size of the legacy file")
+    args = parser.parse_args()
+    run(args.tickets)
+
+
+if __name__ == "__main__":
+    main()
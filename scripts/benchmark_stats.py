@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+StatsManager benchmark suite.
+
+Generates deterministic synthetic histories (same seed and end date give
+the same file) spanning 1 day to 5 years, then times loading, the write
+paths (log_ticket, update_activity), get_stats_range for every metric,
+get_aggregated_stats and the per-second get_current_session_cph used by
+CPHTracker. Results are written as JSON so runs on different commits can
+be compared.
+
+Usage: python scripts/benchmark_stats.py [--spans 1,30,365,1825] [--tickets-per-day 40]
+           [--activity-density 0.9] [--backend json] [--output bench_stats.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.stats_manager import StatsManager, METRICS
+
+SHIFT_START_HOUR = 8
+SHIFT_HOURS = 9
+
+
+def generate(path, days, tickets_per_day, activity_density, end_date, seed=1):
+    """
+    Write a legacy ticket_stats.json covering `days` days up to end_date.
+    Weekdays get about tickets_per_day tickets spread over a shift; a day has
+    activity with probability activity_density.
+    """
+    rnd = random.Random(seed)
+    tickets = []
+    activity = {}
+    first = end_date - timedelta(days=days - 1)
+    for d in range(days):
+        day = first + timedelta(days=d)
+        if day.weekday() >= 5:
+            continue
+        shift_start = datetime(day.year, day.month, day.day, SHIFT_START_HOUR)
+        count = max(0, int(rnd.gauss(tickets_per_day, tickets_per_day * 0.2)))
+        offsets = sorted(rnd.uniform(0, SHIFT_HOURS * 3600) for _ in range(count))
+        for offset in offsets:
+            tickets.append({"timestamp": (shift_start + timedelta(seconds=offset)).isoformat(),
+                            "has_reply": rnd.random() < 0.85})
+        if rnd.random() < activity_density:
+            active = rnd.uniform(0.6, 1.0) * SHIFT_HOURS * 3600
+            activity[day.isoformat()] = {"keys": int(active / 60 * rnd.uniform(40, 80)),
+                                         "clicks": int(active / 60 * rnd.uniform(5, 15)),
+                                         "duration": round(active, 1)}
+    with open(path, 'w') as f:
+        json.dump({"tickets": tickets, "activity": activity}, f)
+    return len(tickets)
+
+
+def time_calls(fn, repeat):
+    """Return (mean, p95) microseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.fmean(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def bench_span(tmp, days, args, end_date):
+    path = os.path.join(tmp, f"stats_{days}.json")
+    tickets = generate(path, days, args.tickets_per_day, args.activity_density, end_date, args.seed)
+    kwargs = {"backend": args.backend, "retention_days": 0, "cache_size": 0}
+
+    # First open migrates the legacy file; time the steady-state load after it
+    StatsManager(path, **kwargs).close()
+    start = time.perf_counter()
+    manager = StatsManager(path, **kwargs)
+    load_us = (time.perf_counter() - start) * 1e6
+
+    end = datetime.combine(end_date, datetime.min.time())
+    range_start = end - timedelta(days=days - 1)
+    session_start = datetime.now() - timedelta(hours=4)
+    results = [{"op": "load", "mean_us": load_us, "p95_us": load_us}]
+
+    cases = [("get_current_session_cph", lambda: manager.get_current_session_cph(session_start))]
+    for period in ("day", "week"):
+        for metric in METRICS:
+            cases.append((f"get_stats_range[{period},{metric}]",
+                          lambda p=period, m=metric: manager.get_stats_range(range_start, end, p, m)))
+    for period, count in (("day", 14), ("week", 12), ("month", 12)):
+        cases.append((f"get_aggregated_stats[{period}]",
+                      lambda p=period, c=count: manager.get_aggregated_stats(p, "cph", c)))
+    cases.append(("log_ticket", lambda: manager.log_ticket(True)))
+    cases.append(("update_activity", lambda: manager.update_activity(10, 2, 1.0)))
+
+    for name, fn in cases:
+        mean, p95 = time_calls(fn, args.repeat)
+        results.append({"op": name, "mean_us": mean, "p95_us": p95})
+    manager.close()
+
+    for r in results:
+        r.update({"span_days": days, "tickets": tickets})
+        r["mean_us"] = round(r["mean_us"], 1)
+        r["p95_us"] = round(r["p95_us"], 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spans", default="1,30,365,1825", help="Comma separated history lengths in days")
+    parser.add_argument("--tickets-per-day", type=int, default=40)
+    parser.add_argument("--activity-density", type=float, default=0.9,
+                        help="Fraction of working days with keyboard/mouse activity")
+    parser.add_argument("--backend", default="json", choices=("json", "sqlite"))
+    parser.add_argument("--repeat", type=int, default=50, help="Calls per timed operation")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--end-date", default=None, help="Last day of the history (YYYY-MM-DD, default today)")
+    parser.add_argument("--output", default="bench_stats.json", help="JSON results file")
+    args = parser.parse_args()
+
+    end_date = datetime.strptime(args.end_date, "%Y-%m-%d").date() if args.end_date else datetime.now().date()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for days in (int(s) for s in args.spans.split(",")):
+            span = bench_span(tmp, days, args, end_date)
+            results.extend(span)
+            print(f"--- {days} days, {span[0]['tickets']} tickets ({args.backend})")
+            for r in span:
+                print(f"{r['op']:<34} {r['mean_us']:>12.1f} us  p95 {r['p95_us']:>12.1f} us")
+
+    report = {
+        "commit": git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"backend": args.backend, "tickets_per_day": args.tickets_per_day,
+                   "activity_density": args.activity_density, "repeat": args.repeat,
+                   "seed": args.seed, "end_date": end_date.isoformat()},
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+UI event-loop latency benchmark for the input sampler modes.
+
+Runs a stand-in for the Tk main loop (a timer tick every few milliseconds
+doing a slice of Python work, like widget updates) while InputMonitor
+polls in a thread or in a child process (ProcessInputMonitor), and reports
+how late the ticks fire and how long their work takes. The key state
+stub is a C library call, which releases the GIL like GetAsyncKeyState
+does, so it runs on any OS and shows the same contention.
+
+Usage: python scripts/benchmark_ui_latency.py [--seconds 5] [--tick-ms 10] [--work-ms 2]
+"""
+
+import argparse
+import ctypes
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.input_monitor import InputMonitor
+from src.core.input_process import ProcessInputMonitor
+from src.core.input_sources import PollingInputSource
+from src.core.stats_manager import StatsManager
+
+
+def make_stub_source():
+    """Poller over a foreign function returning "key up" for every VK (runs in the sampler process too)."""
+    libc = ctypes.cdll.msvcrt if sys.platform == "win32" else ctypes.CDLL(None)
+    # abs(vk) < 0x8000: never down; idle_after is long enough to stay at full rate
+    return PollingInputSource(get_state=libc.abs, idle_after=3600)
+
+
+def spin(iterations):
+    n = 0
+    for _ in range(iterations):
+        n += 1
+    return n
+
+
+def run_loop(seconds, tick, work):
+    """Tick every `tick` seconds doing `work` loop iterations; return (lateness, work time) in ms."""
+    lateness = []
+    durations = []
+    next_tick = time.perf_counter() + tick
+    end = next_tick + seconds
+    while next_tick < end:
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        start = time.perf_counter()
+        lateness.append((start - next_tick) * 1000)
+        # Fixed amount of work, so contention shows up as a longer tick
+        spin(work)
+        durations.append((time.perf_counter() - start) * 1000)
+        next_tick += tick
+    return lateness, durations
+
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    return (f"{name} mean {statistics.fmean(samples):>6.2f}  p99 {samples[int(len(samples) * 0.99)]:>6.2f}"
+            f"  max {samples[-1]:>6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--tick-ms", type=float, default=10)
+    parser.add_argument("--work-ms", type=float, default=2)
+    args = parser.parse_args()
+
+    # Loop iterations that take work-ms without contention
+    start = time.perf_counter()
+    spin(1_000_000)
+    work = int(1_000_000 * args.work_ms / 1000 / (time.perf_counter() - start))
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        stats = StatsManager(os.path.join(tmp, "stats.json"), retention_days=0)
+        monitors = {
+            "none": None,
+            "thread": InputMonitor(stats, make_stub_source()),
+            "process": ProcessInputMonitor(stats, make_stub_source),
+        }
+        for mode, monitor in monitors.items():
+            if monitor is not None:
+                monitor.start()
+                time.sleep(0.5)
+            lateness, durations = run_loop(args.seconds, args.tick_ms / 1000, work)
+            cycles = 0
+            if monitor is not None:
+                cycles = monitor.get_poll_stats().get("cycles", 0)
+                monitor.stop()
+                if not cycles:
+                    print(f"FAIL {mode}: the poller never ran")
+                    ok = False
+            print(f"--- {mode} ({len(lateness)} ticks, {cycles} poll cycles)")
+            print("  " + summarize("tick lateness", lateness))
+            print("  " + summarize("tick work    ", durations))
+        stats.close()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
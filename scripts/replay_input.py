@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Input poller replay check.
+
+Replays a scripted shift of typing bursts and mouse clicks
+separated by idle breaks against the polling sources on a simulated clock.
+Some keys are held past the keyboard auto-repeat delay. Key states come from
+a stub that mimics GetAsyncKeyState (down bit plus the "pressed since the
+last call" bit, which auto-repeat sets again) and GetKeyboardState, so it
+runs on any OS. Fails if a poller misses or double counts a single press, and
+reports the state calls per second of each poller: the per-key poller with
+and without its idle backoff, and the bulk snapshot poller (always 50Hz).
+
+Usage: python scripts/replay_input.py [--minutes 15] [--seed 1]
+"""
+
+import argparse
+import bisect
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.input_sources import (IDLE_AFTER, MOUSE_VKS, POLL_INTERVAL, PollingInputSource,
+                                    SnapshotPollingInputSource)
+
+# Simulated cost of one polling cycle (seconds)
+CYCLE_COST = 0.0005
+
+# Fastest repeat of the same key a person produces (seconds between presses)
+MIN_SAME_KEY_GAP = 0.11
+
+# Shortest key hold and shortest release before pressing the same key again (seconds)
+MIN_HOLD = 0.03
+MIN_RELEASE = 0.03
+
+# Keyboard auto-repeat: delay before the first repeat and repeat period (seconds)
+REPEAT_DELAY = 0.5
+REPEAT_INTERVAL = 0.033
+
+# Share of key presses held past REPEAT_DELAY
+HELD_SHARE = 0.03
+
+
+def script_presses(minutes, seed):
+    """Return [(down_t, up_t, vk)] sorted by down_t."""
+    rnd = random.Random(seed)
+    presses = []
+    last_down = {}
+    last_up = {}
+    t = 1.0
+    end = minutes * 60
+    while t < end:
+        # A burst of typing with the odd click; short holds fall between
+        # two idle-rate cycles
+        for _ in range(rnd.randint(5, 200)):
+            vk = rnd.choice(MOUSE_VKS[:2]) if rnd.random() < 0.05 else rnd.randrange(0x41, 0x5B)
+            t = max(t, last_down.get(vk, -1) + MIN_SAME_KEY_GAP, last_up.get(vk, -1) + MIN_RELEASE)
+            hold = rnd.uniform(MIN_HOLD, 0.12)
+            if vk not in MOUSE_VKS and rnd.random() < HELD_SHARE:
+                # Held key, released at any point of a repeat period
+                hold = rnd.uniform(REPEAT_DELAY, REPEAT_DELAY + 1)
+            presses.append((t, t + hold, vk))
+            last_down[vk] = t
+            last_up[vk] = t + hold
+            t += rnd.uniform(0.06, 0.3)
+        # Pause: short thinking gaps or breaks long enough to go idle
+        t += rnd.uniform(1, 5) if rnd.random() < 0.5 else rnd.uniform(IDLE_AFTER + 1, 3 * IDLE_AFTER)
+    return presses
+
+
+class SimulatedKeyboard:
+    """GetAsyncKeyState / GetKeyboardState stand-ins over a press script at time `now`."""
+    def __init__(self, presses):
+        self.now = 0.0
+        self.calls = 0
+        self.downs = {} # vk -> sorted down times
+        self.ups = {}
+        self.strokes = {} # vk -> sorted key-down messages (presses and auto-repeats)
+        for down, up, vk in presses:
+            self.downs.setdefault(vk, []).append(down)
+            self.ups.setdefault(vk, []).append(up)
+            strokes = self.strokes.setdefault(vk, [])
+            strokes.append(down)
+            if vk not in MOUSE_VKS:
+                repeat = down + REPEAT_DELAY
+                while repeat < up:
+                    strokes.append(repeat)
+                    repeat += REPEAT_INTERVAL
+        self._last_call = {}
+
+    def is_down(self, vk):
+        downs = self.downs.get(vk)
+        if not downs:
+            return False
+        i = bisect.bisect_right(downs, self.now) - 1
+        return i >= 0 and self.ups[vk][i] > self.now
+
+    def get_async_key_state(self, vk):
+        self.calls += 1
+        state = 0x8000 if self.is_down(vk) else 0
+        # LSB: a key-down (press or auto-repeat) happened since this key was last queried
+        strokes = self.strokes.get(vk, ())
+        last = self._last_call.get(vk, -1.0)
+        if bisect.bisect_right(strokes, self.now) > bisect.bisect_right(strokes, last):
+            state |= 0x0001
+        self._last_call[vk] = self.now
+        return state
+
+    def get_keyboard_state(self):
+        self.calls += 1
+        return bytes(0x80 if self.is_down(vk) else 0 for vk in range(256))
+
+
+def replay(make_source, presses, end):
+    keyboard = SimulatedKeyboard(presses)
+    source = make_source(keyboard)
+    detected = [0]
+
+    def sink(kind, timestamp):
+        detected[0] += 1
+
+    state = source.initial_state()
+    t = 0.0
+    while t < end:
+        keyboard.now = t
+        before = detected[0]
+        state = source.poll_idle(state, sink) if source.schedule.idle else source.poll(state, sink)
+        t += source.schedule.update(t, detected[0] - before, CYCLE_COST)
+    return detected[0], keyboard.calls, source.schedule.cycles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=15)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    presses = script_presses(args.minutes, args.seed)
+    end = presses[-1][1] + 1
+    print(f"{len(presses)} presses over {end / 60:.1f} simulated minutes")
+
+    sources = {
+        "poll fixed 50Hz": lambda kb: PollingInputSource(get_state=kb.get_async_key_state, idle_interval=POLL_INTERVAL),
+        "poll adaptive": lambda kb: PollingInputSource(get_state=kb.get_async_key_state),
+        "poll_bulk fixed 50Hz": lambda kb: SnapshotPollingInputSource(get_snapshot=kb.get_keyboard_state),
+    }
+    ok = True
+    for name, make_source in sources.items():
+        detected, calls, cycles = replay(make_source, presses, end)
+        print(f"{name:<20} {detected:>7} detected  {cycles / end:>5.1f} cycles/s  {calls / end:>7.0f} state calls/s")
+        if detected != len(presses):
+            print(f"FAIL {name}: {detected - len(presses):+d} presses")
+            ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+StatsManager concurrency stress test.
+
+Runs ticket and activity writers (like the Tk thread and the InputMonitor
+save thread) against reader threads calling the dashboard and StatsView
+queries, plus forced compactions, for a fixed time. Fails if any thread
+raises, if a reader ever sees a half-applied activity update, or if the
+final totals don't match what was written.
+
+Usage: python scripts/stress_stats.py [--seconds 10] [--backend json|sqlite]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.stats_manager import StatsManager
+
+
+def run(seconds, backend):
+    # Switch threads far more often than the default 5ms to provoke races
+    sys.setswitchinterval(1e-5)
+    errors = []
+    stop = threading.Event()
+    counts = {"tickets": 0, "activity": 0, "reads": 0}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = StatsManager(os.path.join(tmp, "ticket_stats.json"), backend=backend,
+                               flush_latency=0.01, retention_days=0)
+        if backend == "json":
+            manager.store.compact_threshold = 50
+
+        def guarded(fn):
+            def loop():
+                try:
+                    while not stop.is_set():
+                        fn()
+                except Exception as e:
+                    errors.append(f"{threading.current_thread().name}: {e!r}")
+                    stop.set()
+            return loop
+
+        def log_tickets():
+            manager.log_ticket(has_reply=counts["tickets"] % 3 != 0, handle_time=60 + counts["tickets"] % 600)
+            counts["tickets"] += 1
+
+        def log_activity():
+            # keys == clicks in every update, so any snapshot must agree
+            manager.update_activity(7, 7, 1.0)
+            counts["activity"] += 1
+
+        def read_dashboard():
+            today = manager.get_activity_stats("today")
+            if today["keys"] != today["clicks"]:
+                raise AssertionError(f"torn activity snapshot {today}")
+            # Straight from the store too, the cache would hide most races
+            day = manager.store.get_activity(datetime.now().strftime("%Y-%m-%d"))
+            keys = day["keys"]
+            sum(manager.store.daily_counts().values())
+            if day["clicks"] != keys:
+                raise AssertionError(f"activity bucket changed while reading {day}")
+            week = manager.get_activity_stats("week")
+            if week["keys"] != week["clicks"]:
+                raise AssertionError(f"torn activity totals {week}")
+            manager.get_weekly_stats()
+            manager.get_monthly_stats()
+            manager.get_first_ticket_time_today()
+            manager.get_current_session_cph(datetime.now() - timedelta(hours=1))
+            counts["reads"] += 1
+
+        def read_stats_view():
+            now = datetime.now()
+            manager.get_stats_table(now - timedelta(days=30), now)
+            manager.get_handle_time_percentiles(now - timedelta(days=30), now)
+            manager.get_daily_stats()
+            manager.get_aggregated_stats("week", "volume", 8)
+            counts["reads"] += 1
+
+        def compact():
+            if backend == "json":
+                manager.store.compact()
+            time.sleep(0.05)
+
+        threads = [threading.Thread(target=guarded(fn), name=fn.__name__)
+                   for fn in (log_tickets, log_activity, read_dashboard, read_dashboard,
+                              read_stats_view, compact)]
+        for t in threads:
+            t.start()
+        stop.wait(seconds)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        manager.close()
+        reopened = StatsManager(os.path.join(tmp, "ticket_stats.json"), backend=backend, retention_days=0)
+        today = reopened.get_activity_stats("today")
+        total = reopened.store.count_tickets(datetime.now() - timedelta(days=1), None, replies_only=False)
+        reopened.close()
+
+    if today["keys"] != 7 * counts["activity"]:
+        errors.append(f"activity lost: {today['keys']} keys, expected {7 * counts['activity']}")
+    if total != counts["tickets"]:
+        errors.append(f"tickets lost: {total} stored, expected {counts['tickets']}")
+
+    print(f"{backend}: {counts['tickets']} tickets, {counts['activity']} activity updates, "
+          f"{counts['reads']} read rounds in {seconds}s")
+    for e in errors:
+        print(f"FAIL {e}")
+    return not errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--backend", default="json", choices=("json", "sqlite"))
+    args = parser.parse_args()
+    sys.exit(0 if run(args.seconds, args.backend) else 1)
+
+
+if __name__ == "__main__":
+    main()
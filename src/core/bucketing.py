@@ -0,0 +1,92 @@
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict
+
+# Ordinal of 1970-01-01, to turn epoch days into proleptic ordinals
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Hour of day at which a "shift" bucket starts (a night shift stays in one bucket)
+SHIFT_START_HOUR = 6
+
+
+def hour_number(ordinal: int, hour: int = 0) -> int:
+    """Local hours since 0001-01-01 00:00 (a Monday) for a day ordinal and hour of day."""
+    return (ordinal - 1) * 24 + hour
+
+
+def epoch_hour(ts: float) -> int:
+    """Local hour number of an epoch timestamp."""
+    local = ts + time.localtime(ts).tm_gmtoff
+    return hour_number(EPOCH_ORDINAL) + int(local // 3600)
+
+
+class Granularity:
+    """
+    Maps local time to consecutive integer bucket ids, so aggregation is an
+    index computation instead of formatting and comparing string keys.
+
+    hours: bucket width in hours, counted from hour 0 = Monday 0001-01-01
+           00:00 shifted by offset hours (0 means calendar months).
+    label: formats the start datetime of a bucket for chart axes.
+
+    Bucket ids are consecutive, so the buckets between two points in time
+    are simply range(first_id, last_id + 1).
+    """
+    def __init__(self, name, hours, label: Callable[[datetime], str], offset=0):
+        self.name = name
+        self.hours = hours
+        self.offset = offset
+        self.format_label = label
+
+    @property
+    def daily(self) -> bool:
+        """True when every bucket boundary is a midnight, so per-day rollups fill buckets exactly."""
+        return self.hours == 0 or (self.hours % 24 == 0 and self.offset % 24 == 0)
+
+    def from_hour(self, h: int) -> int:
+        """Bucket id of local hour number h."""
+        if self.hours == 0:
+            day = date.fromordinal(h // 24 + 1)
+            return day.year * 12 + day.month - 1
+        return (h - self.offset) // self.hours
+
+    def from_ordinal(self, ordinal: int) -> int:
+        """Bucket id of the start (00:00) of a day."""
+        return self.from_hour(hour_number(ordinal))
+
+    def from_datetime(self, dt: datetime) -> int:
+        return self.from_hour(hour_number(dt.toordinal(), dt.hour))
+
+    def from_epoch(self, ts: float) -> int:
+        return self.from_hour(epoch_hour(ts))
+
+    def start(self, bucket: int) -> datetime:
+        """Local datetime at which a bucket begins."""
+        if self.hours == 0:
+            return datetime(bucket // 12, bucket % 12 + 1, 1)
+        h = bucket * self.hours + self.offset
+        return datetime.fromordinal(h // 24 + 1) + timedelta(hours=h % 24)
+
+    def label(self, bucket: int) -> str:
+        return self.format_label(self.start(bucket))
+
+    def span(self, start_date, end_date) -> range:
+        """Ids of every bucket touching the days start_date..end_date (inclusive)."""
+        first = self.from_ordinal(start_date.toordinal())
+        last = self.from_hour(hour_number(end_date.toordinal(), 23))
+        return range(first, last + 1)
+
+
+# Chart periods by name. A new granularity is one more entry here.
+GRANULARITIES: Dict[str, Granularity] = {
+    "hour": Granularity("hour", 1, lambda d: d.strftime("%a %H:00")),
+    "shift": Granularity("shift", 24, lambda d: d.strftime("%a %d"), offset=SHIFT_START_HOUR),
+    "day": Granularity("day", 24, lambda d: d.strftime("%a %d")),
+    "week": Granularity("week", 7 * 24, lambda d: f"Wk {d.isocalendar()[1]}"),
+    "month": Granularity("month", 0, lambda d: d.strftime("%b %Y")),
+}
+
+
+def granularity(period: str) -> Granularity:
+    """Granularity for a period name; unknown names fall back to days."""
+    return GRANULARITIES.get(period, GRANULARITIES["day"])
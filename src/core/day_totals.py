@@ -0,0 +1,77 @@
+from datetime import date
+from typing import Dict, Optional
+
+# Days allocated beyond the newest day when the trees have to grow
+GROWTH_DAYS = 366
+
+
+class DayTotals:
+    """
+    Per-day activity totals (keys, clicks, duration) in Fenwick trees indexed
+    by ordinal day, so the total over any date range is O(log n) and adding
+    to a day is O(log n).
+
+    Days before the first one seen or past the allocated capacity trigger a
+    rebuild from the plain per-day values, which only happens when the
+    calendar moves past the preallocated year or on backdated data.
+    """
+    FIELDS = ("keys", "clicks", "duration")
+
+    def __init__(self):
+        self._base = 0 # ordinal of tree position 1
+        self._size = 0
+        self._days = {} # ordinal -> [keys, clicks, duration]
+        self._trees = [[] for _ in self.FIELDS]
+
+    def add(self, day: date, keys=0, clicks=0, duration=0):
+        ordinal = day.toordinal()
+        values = self._days.get(ordinal)
+        if values is None:
+            values = self._days[ordinal] = [0, 0, 0]
+        values[0] += keys
+        values[1] += clicks
+        values[2] += duration
+
+        if not self._base <= ordinal < self._base + self._size:
+            self._rebuild()
+            return
+        i = ordinal - self._base + 1
+        for tree, delta in zip(self._trees, (keys, clicks, duration)):
+            j = i
+            while j <= self._size:
+                tree[j] += delta
+                j += j & -j
+
+    def _rebuild(self):
+        """Reallocate the trees to cover every known day plus headroom."""
+        self._base = min(self._days)
+        self._size = max(self._days) - self._base + 1 + GROWTH_DAYS
+        self._trees = [[0] * (self._size + 1) for _ in self.FIELDS]
+        for ordinal, values in self._days.items():
+            for tree, value in zip(self._trees, values):
+                tree[ordinal - self._base + 1] += value
+        # O(n) in-place Fenwick construction
+        for tree in self._trees:
+            for i in range(1, self._size + 1):
+                parent = i + (i & -i)
+                if parent <= self._size:
+                    tree[parent] += tree[i]
+
+    def _prefix(self, ordinal):
+        """Totals of every day up to and including ordinal."""
+        i = min(ordinal - self._base + 1, self._size)
+        sums = [0, 0, 0]
+        while i > 0:
+            for f, tree in enumerate(self._trees):
+                sums[f] += tree[i]
+            i -= i & -i
+        return sums
+
+    def total(self, start: date, end: Optional[date] = None) -> Dict:
+        """Return {"keys", "clicks", "duration"} summed over start <= day <= end."""
+        if not self._days:
+            return {"keys": 0, "clicks": 0, "duration": 0}
+        hi = self._prefix(end.toordinal()) if end is not None else self._prefix(self._base + self._size)
+        lo = self._prefix(start.toordinal() - 1)
+        # Rounding drops float noise left by the subtraction (e.g. 1e-12 for an empty range)
+        return {"keys": hi[0] - lo[0], "clicks": hi[1] - lo[1], "duration": round(hi[2] - lo[2], 6)}
@@ -0,0 +1,93 @@
+import math
+from typing import Dict, Iterable
+
+# Quantiles are reported within this relative error (1% of the true value)
+RELATIVE_ACCURACY = 0.01
+
+# Handle times below this many seconds are counted in a single zero bucket
+MIN_HANDLE_TIME = 1.0
+
+
+class HandleTimeSketch:
+    """
+    Mergeable quantile sketch of handle times (seconds), in the style of
+    DDSketch: values are counted in logarithmic buckets whose width is a
+    fixed fraction of their value, so any quantile comes back within
+    RELATIVE_ACCURACY. Merging two sketches just adds their bucket counts,
+    which makes per-day sketches combine exactly into any date range.
+
+    A day of tickets spans at most a few hundred buckets whatever the
+    ticket count.
+    """
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets = {} # bucket index -> count
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = 0.0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value: float):
+        if value < MIN_HANDLE_TIME:
+            self.zero_count += 1
+        else:
+            i = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[i] = self.buckets.get(i, 0) + 1
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def copy(self) -> "HandleTimeSketch":
+        sketch = HandleTimeSketch(self.relative_accuracy)
+        sketch.merge(self)
+        return sketch
+
+    def merge(self, other: "HandleTimeSketch"):
+        for i, n in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q (0..1), or 0.0 for an empty sketch."""
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return self.min
+        for i in sorted(self.buckets):
+            seen += self.buckets[i]
+            if seen > rank:
+                # Bucket i holds (gamma^(i-1), gamma^i]; its midpoint in relative terms
+                value = 2 * self._gamma ** i / (self._gamma + 1)
+                return max(self.min, min(self.max, value))
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {"n": self.count, "zero": self.zero_count, "min": self.min, "max": self.max,
+                "buckets": {str(i): n for i, n in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HandleTimeSketch":
+        sketch = cls()
+        sketch.count = data.get("n", 0)
+        sketch.zero_count = data.get("zero", 0)
+        sketch.min = data.get("min", math.inf) if sketch.count else math.inf
+        sketch.max = data.get("max", 0.0)
+        sketch.buckets = {int(i): n for i, n in data.get("buckets", {}).items()}
+        return sketch
+
+    @classmethod
+    def merged(cls, sketches: Iterable["HandleTimeSketch"]) -> "HandleTimeSketch":
+        total = cls()
+        for sketch in sketches:
+            total.merge(sketch)
+        return total
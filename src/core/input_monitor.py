@@ -1,17 +1,20 @@
-import keyboard
 import threading
 import time
-import ctypes
-from collections import deque
+from .input_sources import CLICK, PollingInputSource
+from .rolling_counter import RollingCounter
 
 class InputMonitor:
     """
     Monitors keyboard and mouse input in the background.
     Calculates KPM (Keys Per Minute) and CPM (Clicks Per Minute).
-    Uses hardware polling for mouse clicks to ensure capture in VDIs.
+
+    Presses come from an InputSource (see input_sources.py). The default
+    polls key states, which ensures capture in VDIs; every source shares
+    the counting, rolling windows and persistence implemented here.
     """
-    def __init__(self, stats_manager):
+    def __init__(self, stats_manager, source=None):
         self.stats_manager = stats_manager
+        self.source = source or PollingInputSource()
         
         # Session totals (since app start)
         self.session_keys = 0
@@ -20,9 +23,9 @@ class InputMonitor:
         self.session_start = time.time()
         self._session_restored = False
         
-        # Rolling window for "Current" KPM/CPM (last 60 seconds)
-        self._key_timestamps = deque()
-        self._click_timestamps = deque()
+        # Rolling 1/5/15 minute windows for "Current" KPM/CPM (per-second rings)
+        self._key_counter = RollingCounter()
+        self._click_counter = RollingCounter()
         
         # Delta counters for saving to persistent storage
         self._delta_keys = 0
@@ -64,73 +67,36 @@ class InputMonitor:
         # Start periodic save thread
         threading.Thread(target=self._periodic_save, daemon=True).start()
         
-        # Start unified input polling thread (Robust for VDI/Omnissa)
-        # Replaces keyboard.hook and separate mouse poller
-        threading.Thread(target=self._input_poller, daemon=True).start()
+        self._start_sampling()
         
     def stop(self):
         """Stop monitoring and save remaining stats."""
         self.running = False
         self._stop_event.set()
+        self._stop_sampling()
         
-        # Save remaining data
+        # Save remaining data and wait for it to reach the disk
         self._save_deltas()
+        self.stats_manager.flush(timeout=5)
             
-    def _input_poller(self):
-        """
-        Polls keyboard and mouse using GetAsyncKeyState.
-        This technique bypasses hook limitations in VDI environments (Citrix/Omnissa).
-        """
-        # Track state of all keys (0-255)
-        # We start with all assuming False to detect initial presses correctly
-        key_states = [False] * 256
-        
-        # Mouse VKs
-        VK_LBUTTON = 0x01
-        VK_RBUTTON = 0x02
-        VK_MBUTTON = 0x04
-        
-        while self.running:
-            try:
-                start_time = time.time()
-                
-                # Iterate through relevant Virtual Key codes
-                # 1-254 (0 is undefined, 255 is reserved)
-                # Performance: 255 ctypes calls takes ~2-5ms usually.
-                for vk in range(1, 255):
-                    # Check if key is down (MSB set)
-                    # GetAsyncKeyState returns short
-                    state = ctypes.windll.user32.GetAsyncKeyState(vk)
-                    is_down = (state & 0x8000) != 0
-                    
-                    # Rising Edge Detection (Pressed now, wasn't before)
-                    if is_down and not key_states[vk]:
-                        now = time.time()
-                        
-                        # Determine if Mouse or Keyboard
-                        if vk in (VK_LBUTTON, VK_RBUTTON, VK_MBUTTON):
-                            self.session_clicks += 1
-                            with self._lock:
-                                self._delta_clicks += 1
-                                self._click_timestamps.append(now)
-                        else:
-                            # It's a key
-                            self.session_keys += 1
-                            with self._lock:
-                                self._delta_keys += 1
-                                self._key_timestamps.append(now)
-                                
-                    key_states[vk] = is_down
-                    
-                # Rate limiting to ~50Hz (20ms is granular enough for typing)
-                elapsed = time.time() - start_time
-                sleep_time = 0.02 - elapsed
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                    
-            except Exception as e:
-                print(f"Input polling error: {e}")
-                time.sleep(1)
+    def _start_sampling(self):
+        # Start the input source; it reports presses to _on_input
+        self.source.start(self._on_input)
+
+    def _stop_sampling(self):
+        self.source.stop()
+
+    def _on_input(self, kind, timestamp):
+        """Count one key press or click reported by the input source."""
+        with self._lock:
+            if kind == CLICK:
+                self.session_clicks += 1
+                self._delta_clicks += 1
+                self._click_counter.add(timestamp)
+            else:
+                self.session_keys += 1
+                self._delta_keys += 1
+                self._key_counter.add(timestamp)
 
     def _save_deltas(self):
         """Save accumulated deltas to stats manager."""
@@ -163,6 +129,10 @@ class InputMonitor:
                 break
             self._save_deltas()
             
+    def get_poll_stats(self):
+        """Current sampling rate and cycle-time histogram of a polling source ({} for hooks)."""
+        return self.source.get_stats()
+
     def get_session_kpm(self):
         """Calculate KPM for the current session (Active Time)."""
         minutes = self.session_active_duration / 60
@@ -177,19 +147,20 @@ class InputMonitor:
 
     def get_current_kpm(self):
         """Calculate KPM over the last 60 seconds (rolling window)."""
-        now = time.time()
-        cutoff = now - 60
-        with self._lock:
-            # Remove timestamps older than 60s
-            while self._key_timestamps and self._key_timestamps[0] < cutoff:
-                self._key_timestamps.popleft()
-            return len(self._key_timestamps)
+        return self.get_rolling_kpm(60)
 
     def get_current_cpm(self):
         """Calculate CPM over the last 60 seconds (rolling window)."""
+        return self.get_rolling_cpm(60)
+
+    def get_rolling_kpm(self, window=60):
+        """Keys per minute over the last `window` seconds (60, 300 or 900)."""
+        now = time.time()
+        with self._lock:
+            return int(self._key_counter.rate_per_minute(window, now))
+
+    def get_rolling_cpm(self, window=60):
+        """Clicks per minute over the last `window` seconds (60, 300 or 900)."""
         now = time.time()
-        cutoff = now - 60
         with self._lock:
-            while self._click_timestamps and self._click_timestamps[0] < cutoff:
-                self._click_timestamps.popleft()
-            return len(self._click_timestamps)
+            return int(self._click_counter.rate_per_minute(window, now))
@@ -0,0 +1,250 @@
+import multiprocessing
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable
+
+from .input_monitor import InputMonitor
+from .input_sources import CLICK, CYCLE_BUCKET_LABELS, InputSource
+from .rolling_counter import ROLLING_WINDOWS, RollingCounter
+
+# Seconds between two counter publications of the sampler process
+PUBLISH_INTERVAL = 0.25
+
+# Seconds to wait for the sampler process to exit before terminating it
+STOP_TIMEOUT = 2
+
+# Attempts of a counter read racing a publication before using the last good copy
+READ_RETRIES = 1000
+
+
+class SharedCounters:
+    """
+    Input counters in a shared memory block, written by the sampler process
+    and read by the GUI process without any lock.
+
+    The block starts with a sequence number (seqlock): the writer makes it
+    odd, writes the counters, then makes it even again. A reader copies the
+    counters and retries if the number was odd or changed meanwhile, so it
+    never sees a half-written update and never blocks the writer. Retries
+    are bounded: a writer killed mid-publish leaves the number odd for good,
+    and the reader then keeps the last consistent copy.
+
+    A stop flag after the counters asks the sampler to exit; unlike a
+    multiprocessing.Event it takes no lock a killed process could hold.
+    """
+    _seq = struct.Struct("<Q")
+    # published_at, keys, clicks, key and click counts per rolling window,
+    # poll rate (Hz, 0 without a polling source), idle, cycles, histogram
+    _body = struct.Struct(f"<dQQ{len(ROLLING_WINDOWS)}Q{len(ROLLING_WINDOWS)}QdQQ{len(CYCLE_BUCKET_LABELS)}Q")
+    _stop = struct.Struct("<Q")
+    _stop_offset = _seq.size + _body.size
+    size = _stop_offset + _stop.size
+
+    def __init__(self, name=None):
+        """Create a new block, or attach to the block called name."""
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=self.size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self._buf = self._shm.buf
+        # Last consistent copy of the counters (all zero until the first read)
+        self._values = self._body.unpack(bytes(self._body.size))
+
+    def publish(self, keys, clicks, key_windows, click_windows, poll_stats):
+        seq = self._seq.unpack_from(self._buf, 0)[0]
+        self._seq.pack_into(self._buf, 0, seq + 1)
+        rate = poll_stats.get("rate_hz", 0)
+        histogram = list(poll_stats.get("cycle_histogram", {}).values()) or [0] * len(CYCLE_BUCKET_LABELS)
+        self._body.pack_into(self._buf, self._seq.size, time.time(), keys, clicks, *key_windows, *click_windows,
+                             rate, poll_stats.get("idle", False), poll_stats.get("cycles", 0), *histogram)
+        self._seq.pack_into(self._buf, 0, seq + 2)
+
+    def read(self, retries=READ_RETRIES):
+        """Return a consistent copy of the counters as a dict (the last one read after `retries` torn reads)."""
+        for _ in range(retries):
+            before = self._seq.unpack_from(self._buf, 0)[0]
+            if not before & 1:
+                values = self._body.unpack_from(self._buf, self._seq.size)
+                if self._seq.unpack_from(self._buf, 0)[0] == before:
+                    self._values = values
+                    break
+            time.sleep(0)
+        values = self._values
+        n = len(ROLLING_WINDOWS)
+        poll_stats = {}
+        if values[3 + 2 * n]:
+            poll_stats = {"rate_hz": round(values[3 + 2 * n], 1), "idle": bool(values[4 + 2 * n]),
+                          "cycles": values[5 + 2 * n],
+                          "cycle_histogram": dict(zip(CYCLE_BUCKET_LABELS, values[6 + 2 * n:]))}
+        return {"published_at": values[0], "keys": values[1], "clicks": values[2],
+                "key_windows": values[3:3 + n], "click_windows": values[3 + n:3 + 2 * n],
+                "poll_stats": poll_stats}
+
+    def request_stop(self):
+        self._stop.pack_into(self._buf, self._stop_offset, 1)
+
+    def stop_requested(self):
+        return self._stop.unpack_from(self._buf, self._stop_offset)[0] == 1
+
+    def close(self, unlink=False):
+        self._buf = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+def _sampler_main(shm_name, make_source, publish_interval):
+    """Sampler process: run the input source and publish its counts until a stop is requested."""
+    counters = SharedCounters(shm_name)
+    key_counter = RollingCounter()
+    click_counter = RollingCounter()
+    totals = [0, 0] # keys, clicks
+    lock = threading.Lock()
+
+    def sink(kind, timestamp):
+        with lock:
+            if kind == CLICK:
+                totals[1] += 1
+                click_counter.add(timestamp)
+            else:
+                totals[0] += 1
+                key_counter.add(timestamp)
+
+    def publish():
+        now = time.time()
+        with lock:
+            keys, clicks = totals
+            key_windows = [key_counter.count(w, now) for w in ROLLING_WINDOWS]
+            click_windows = [click_counter.count(w, now) for w in ROLLING_WINDOWS]
+        counters.publish(keys, clicks, key_windows, click_windows, source.get_stats())
+
+    source = make_source()
+    try:
+        source.start(sink)
+        while not counters.stop_requested():
+            time.sleep(publish_interval)
+            publish()
+    except Exception as e:
+        print(f"Input sampler error: {e}")
+    finally:
+        source.stop()
+        publish()
+        counters.close()
+
+
+class ProcessInputMonitor(InputMonitor):
+    """
+    InputMonitor whose sampling loop runs in a child process, so polling
+    does not compete with the Tk main loop and the worker thread for the GIL.
+
+    make_source is called in the child (it must be picklable, e.g. a
+    functools.partial of create_input_source). The child publishes running
+    totals and rolling window counts every PUBLISH_INTERVAL seconds through
+    SharedCounters; the getters read them lock-free, and persistence works
+    on the difference between two reads. Falls back to sampling in a thread
+    when the process cannot be started.
+    """
+    def __init__(self, stats_manager, make_source: Callable[[], InputSource], publish_interval=PUBLISH_INTERVAL):
+        self.make_source = make_source
+        self.publish_interval = publish_interval
+        self.counters = None
+        self._process = None
+        self._last = {"keys": 0, "clicks": 0}
+        # Totals already handed to _save_deltas
+        self._saved_keys = 0
+        self._saved_clicks = 0
+        super().__init__(stats_manager, source=InputSource())
+
+    def _read(self):
+        """Latest counters published by the sampler (the last ones once it stopped)."""
+        if self.counters is not None:
+            # A dead sampler publishes nothing more; don't wait out the retries
+            alive = self._process is not None and self._process.is_alive()
+            self._last = self.counters.read(READ_RETRIES if alive else 1)
+        return self._last
+
+    # Session totals are the restored (or thread fallback) counts plus the sampler's totals
+    @property
+    def session_keys(self):
+        return self._session_keys + self._read()["keys"]
+
+    @session_keys.setter
+    def session_keys(self, value):
+        self._session_keys = value - self._read()["keys"]
+
+    @property
+    def session_clicks(self):
+        return self._session_clicks + self._read()["clicks"]
+
+    @session_clicks.setter
+    def session_clicks(self, value):
+        self._session_clicks = value - self._read()["clicks"]
+
+    def _start_sampling(self):
+        # A new sampler counts from zero: fold the previous run into the base totals
+        self._session_keys += self._last["keys"]
+        self._session_clicks += self._last["clicks"]
+        self._last = {"keys": 0, "clicks": 0}
+        self._saved_keys = self._saved_clicks = 0
+        try:
+            ctx = multiprocessing.get_context("spawn")
+            self.counters = SharedCounters()
+            self._process = ctx.Process(target=_sampler_main, name="InputSampler", daemon=True,
+                                        args=(self.counters.name, self.make_source, self.publish_interval))
+            self._process.start()
+        except Exception as e:
+            print(f"Could not start input sampler process ({e}), sampling in a thread")
+            if self.counters is not None:
+                self.counters.close(unlink=True)
+                self.counters = None
+            self._process = None
+            self.source = self.make_source()
+            super()._start_sampling()
+
+    def _stop_sampling(self):
+        if self._process is None:
+            super()._stop_sampling()
+            return
+        self.counters.request_stop()
+        self._process.join(STOP_TIMEOUT)
+        if self._process.is_alive():
+            print("Input sampler did not stop, terminating it")
+            self._process.terminate()
+            self._process.join(STOP_TIMEOUT)
+        self._process = None
+
+    def stop(self):
+        super().stop()
+        # Keep the final counts readable after the block is gone
+        if self.counters is not None:
+            self._read()
+            counters = self.counters
+            self.counters = None
+            counters.close(unlink=True)
+
+    def _save_deltas(self):
+        last = self._read()
+        with self._lock:
+            self._delta_keys += last["keys"] - self._saved_keys
+            self._delta_clicks += last["clicks"] - self._saved_clicks
+            self._saved_keys = last["keys"]
+            self._saved_clicks = last["clicks"]
+        super()._save_deltas()
+
+    def get_poll_stats(self):
+        if self.counters is None:
+            return super().get_poll_stats()
+        return self._read()["poll_stats"]
+
+    def get_rolling_kpm(self, window=60):
+        if self.counters is None:
+            return super().get_rolling_kpm(window)
+        return int(self._read()["key_windows"][ROLLING_WINDOWS.index(window)] * 60 / window)
+
+    def get_rolling_cpm(self, window=60):
+        if self.counters is None:
+            return super().get_rolling_cpm(window)
+        return int(self._read()["click_windows"][ROLLING_WINDOWS.index(window)] * 60 / window)
@@ -0,0 +1,346 @@
+import ctypes
+import threading
+import time
+from typing import Callable, Iterable, Optional, Tuple
+
+# Kinds of input reported to InputMonitor
+KEY = "key"
+CLICK = "click"
+
+# Virtual-key codes of the mouse buttons, every other code counts as a key
+VK_LBUTTON = 0x01
+VK_RBUTTON = 0x02
+VK_MBUTTON = 0x04
+MOUSE_VKS = (VK_LBUTTON, VK_RBUTTON, VK_MBUTTON)
+
+# Seconds per polling cycle (~50Hz is granular enough for typing)
+POLL_INTERVAL = 0.02
+
+# Seconds per cycle once idle; faster than the same key can be pressed twice
+IDLE_POLL_INTERVAL = 0.1
+
+# Seconds without input after which the poller drops to IDLE_POLL_INTERVAL
+IDLE_AFTER = 30
+
+# Upper bounds (microseconds) of the cycle-time histogram buckets
+CYCLE_BUCKETS_US = (50, 100, 250, 500, 1000, 2500, 5000)
+CYCLE_BUCKET_LABELS = [f"<={b}us" for b in CYCLE_BUCKETS_US] + [f">{CYCLE_BUCKETS_US[-1]}us"]
+
+# Key-down bit (0x80) of every byte of a 256-byte key state snapshot, VKs 1-254
+DOWN_MASK = int.from_bytes(bytes([0] + [0x80] * 254 + [0]), "little")
+
+
+class InputSource:
+    """
+    Where InputMonitor gets key presses and mouse clicks from.
+
+    A source reports every press exactly once by calling the sink given to
+    start() as sink(kind, timestamp), kind being KEY or CLICK. Counting,
+    rolling windows and persistence stay in InputMonitor, so all sources
+    share them.
+    """
+    name = "none"
+
+    def start(self, sink: Callable[[str, float], None]):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    def get_stats(self):
+        """Sampling counters (polling sources only)."""
+        return {}
+
+
+class PollSchedule:
+    """
+    Adaptive polling rate: full rate while input arrives, idle_interval once
+    there was no input for idle_after seconds, and back to full rate on the
+    first press. Also keeps a histogram of polling cycle times.
+    """
+    def __init__(self, interval=POLL_INTERVAL, idle_interval=IDLE_POLL_INTERVAL, idle_after=IDLE_AFTER):
+        self.active_interval = interval
+        self.idle_interval = idle_interval
+        self.idle_after = idle_after
+        self.idle = False
+        self.cycles = 0
+        self.histogram = [0] * (len(CYCLE_BUCKETS_US) + 1)
+        self._last_input = None
+
+    @property
+    def interval(self):
+        return self.idle_interval if self.idle else self.active_interval
+
+    def update(self, now, pressed, cycle_time):
+        """Record a cycle that saw `pressed` presses and took cycle_time seconds; return the next interval."""
+        self.cycles += 1
+        us = cycle_time * 1e6
+        i = 0
+        while i < len(CYCLE_BUCKETS_US) and us > CYCLE_BUCKETS_US[i]:
+            i += 1
+        self.histogram[i] += 1
+
+        if self._last_input is None:
+            self._last_input = now
+        if pressed:
+            self._last_input = now
+            self.idle = False
+        elif now - self._last_input >= self.idle_after:
+            self.idle = True
+        return self.interval
+
+    def get_stats(self):
+        return {"rate_hz": round(1 / self.interval, 1), "idle": self.idle, "cycles": self.cycles,
+                "cycle_histogram": dict(zip(CYCLE_BUCKET_LABELS, self.histogram))}
+
+
+class PollingInputSource(InputSource):
+    """
+    Polls every virtual key with GetAsyncKeyState and reports rising edges.
+    Works where hooks see nothing (VDI sessions such as Citrix/Omnissa),
+    at the cost of ~254 calls per cycle.
+
+    The rate adapts (see PollSchedule): after idle_after seconds without
+    input it drops to idle_interval. A key tapped and released between two
+    slow cycles is still counted from the "pressed since the last call" bit
+    of GetAsyncKeyState.
+
+    get_state(vk) returns the GetAsyncKeyState short; it can be replaced to
+    drive the poller without Windows.
+    """
+    name = "poll"
+
+    def __init__(self, interval=POLL_INTERVAL, get_state: Optional[Callable[[int], int]] = None,
+                 idle_interval=IDLE_POLL_INTERVAL, idle_after=IDLE_AFTER):
+        self.schedule = PollSchedule(interval, idle_interval, idle_after)
+        self.get_state = get_state
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _open(self):
+        """Bind the Windows state function unless one was injected."""
+        if self.get_state is None:
+            self.get_state = ctypes.windll.user32.GetAsyncKeyState
+
+    def start(self, sink):
+        self._open()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(sink,), daemon=True, name="InputPoller")
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(1)
+
+    def initial_state(self):
+        # Every key up, so keys held at startup count once
+        return [False] * 256
+
+    def poll(self, key_states, sink):
+        """One polling cycle over VKs 1-254 (0 is undefined, 255 reserved). Returns the new key states."""
+        get_state = self.get_state
+        for vk in range(1, 255):
+            # Key is down when the MSB of the returned short is set
+            state = get_state(vk)
+            is_down = (state & 0x8000) != 0
+
+            # Rising edge (pressed now, wasn't before), or a press that came
+            # and went since the last call (LSB), which slow cycles can miss.
+            # Auto-repeat sets the LSB too, so it only counts for a key that
+            # was up at the previous cycle, not for the release of a held key
+            if (is_down and not key_states[vk]) or (state & 0x0001 and not is_down and not key_states[vk]):
+                sink(CLICK if vk in MOUSE_VKS else KEY, time.time())
+            key_states[vk] = is_down
+        return key_states
+
+    def poll_idle(self, key_states, sink):
+        """Polling cycle used at the idle rate."""
+        return self.poll(key_states, sink)
+
+    def get_stats(self):
+        return self.schedule.get_stats()
+
+    def _run(self, sink):
+        key_states = self.initial_state()
+        pressed = [0]
+
+        def counting_sink(kind, timestamp):
+            pressed[0] += 1
+            sink(kind, timestamp)
+
+        while not self._stop_event.is_set():
+            try:
+                start_time = time.perf_counter()
+                pressed[0] = 0
+                if self.schedule.idle:
+                    key_states = self.poll_idle(key_states, counting_sink)
+                else:
+                    key_states = self.poll(key_states, counting_sink)
+                cycle_time = time.perf_counter() - start_time
+                interval = self.schedule.update(time.time(), pressed[0], cycle_time)
+                sleep_time = interval - cycle_time
+                if sleep_time > 0:
+                    self._stop_event.wait(sleep_time)
+            except Exception as e:
+                print(f"Input polling error: {e}")
+                self._stop_event.wait(1)
+
+
+def _windows_snapshot():
+    """
+    Return a function reading all 256 key states with one GetKeyboardState
+    call. GetKeyState(0) first makes Windows sync the calling thread's key
+    state table with the current input.
+    """
+    user32 = ctypes.windll.user32
+    buf = (ctypes.c_ubyte * 256)()
+
+    def snapshot():
+        user32.GetKeyState(0)
+        user32.GetKeyboardState(buf)
+        return bytes(buf)
+    return snapshot
+
+
+class SnapshotPollingInputSource(PollingInputSource):
+    """
+    Poller reading the whole keyboard state in one call per cycle instead
+    of one call per key. The snapshot is packed into a single integer and
+    rising edges are found with two bitwise operations (down & ~previous),
+    so an idle cycle does no per-key Python work at all; only pressed keys
+    are visited.
+
+    It always polls at the full rate: a snapshot only shows the keys down
+    right now, so a slower idle rate could miss a quick tap, and a cycle
+    costs about a microsecond, so backing off would save nothing.
+
+    get_snapshot() returns 256 bytes with bit 0x80 set for keys that are
+    down (GetKeyboardState layout); it can be replaced to drive the poller
+    without Windows.
+    """
+    name = "poll_bulk"
+
+    def __init__(self, interval=POLL_INTERVAL, get_snapshot: Optional[Callable[[], bytes]] = None):
+        super().__init__(interval, idle_interval=interval)
+        self.get_snapshot = get_snapshot
+
+    def _open(self):
+        if self.get_snapshot is None:
+            self.get_snapshot = _windows_snapshot()
+
+    def initial_state(self):
+        return 0
+
+    def poll(self, previous, sink):
+        """One polling cycle; previous and the return value are packed down bits."""
+        down = int.from_bytes(self.get_snapshot(), "little") & DOWN_MASK
+        pressed = down & ~previous
+        if pressed:
+            now = time.time()
+            while pressed:
+                low = pressed & -pressed
+                vk = (low.bit_length() - 1) >> 3
+                sink(CLICK if vk in MOUSE_VKS else KEY, now)
+                pressed ^= low
+        return down
+
+
+class HookInputSource(InputSource):
+    """
+    Event-driven source on pynput's keyboard and mouse listeners (low-level
+    hooks on Windows, X11 on Linux). Costs nothing while idle, but hooks
+    may miss input inside VDI windows. Auto-repeat of a held key is counted
+    once, like the poller does.
+
+    Raises ImportError when pynput is not installed.
+    """
+    name = "hook"
+
+    def __init__(self):
+        from pynput import keyboard, mouse
+        self._keyboard = keyboard
+        self._mouse = mouse
+        self._listeners = []
+        self._held = set()
+
+    def _key_id(self, listener, key):
+        """
+        Identity of the physical key. Press and release may report different
+        chars (Shift+A then releasing Shift: 'A' down, 'a' up), so use the
+        virtual-key code, or the listener's canonical form if there is none.
+        """
+        vk = getattr(key, "vk", None)
+        if vk is None:
+            vk = getattr(getattr(key, "value", None), "vk", None)
+        return ("vk", vk) if vk is not None else listener.canonical(key)
+
+    def start(self, sink):
+        self._held = set()
+
+        def on_press(key):
+            key_id = self._key_id(keyboard_listener, key)
+            if key_id not in self._held:
+                self._held.add(key_id)
+                sink(KEY, time.time())
+
+        def on_release(key):
+            self._held.discard(self._key_id(keyboard_listener, key))
+
+        def on_click(x, y, button, pressed):
+            if pressed:
+                sink(CLICK, time.time())
+
+        keyboard_listener = self._keyboard.Listener(on_press=on_press, on_release=on_release)
+        self._listeners = [keyboard_listener, self._mouse.Listener(on_click=on_click)]
+        for listener in self._listeners:
+            listener.daemon = True
+            listener.start()
+
+    def stop(self):
+        for listener in self._listeners:
+            listener.stop()
+        self._listeners = []
+
+
+class SyntheticInputSource(InputSource):
+    """Source driven by code, for tests and benchmarks: press() or replay() feed the sink directly."""
+    name = "synthetic"
+
+    def __init__(self):
+        self._sink = None
+
+    def start(self, sink):
+        self._sink = sink
+
+    def stop(self):
+        self._sink = None
+
+    def press(self, kind=KEY, timestamp: Optional[float] = None):
+        if self._sink is not None:
+            self._sink(kind, time.time() if timestamp is None else timestamp)
+
+    def replay(self, events: Iterable[Tuple[float, str]]):
+        """Report (timestamp, kind) events in order."""
+        for timestamp, kind in events:
+            self.press(kind, timestamp)
+
+
+def create_input_source(name="poll", idle_after=IDLE_AFTER) -> InputSource:
+    """
+    Create the input source selected in config: "poll" (default, works in
+    VDI sessions), "poll_bulk" (one keyboard snapshot per cycle), "hook"
+    (pynput, idle-free) or "synthetic".
+    idle_after: seconds without input before the "poll" backend slows down.
+    Falls back to polling when the hook backend is unavailable.
+    """
+    if name == "hook":
+        try:
+            return HookInputSource()
+        except ImportError as e:
+            print(f"Hook input backend unavailable ({e}), falling back to polling")
+    elif name == "poll_bulk":
+        return SnapshotPollingInputSource()
+    elif name == "synthetic":
+        return SyntheticInputSource()
+    return PollingInputSource(idle_after=idle_after)
@@ -0,0 +1,78 @@
+import functools
+import threading
+from collections import OrderedDict
+from datetime import date
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of StatsManager query results.
+
+    Entries are tagged with the data version they were computed at; bump()
+    (called on every mutation) makes them stale. Results marked historical
+    cover only days before today, which can no longer change, and stay valid
+    across versions. Cached values are shared, callers must not mutate them.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (version or None, value)
+        self._lock = threading.Lock()
+
+    def bump(self):
+        """Invalidate every non-historical entry."""
+        with self._lock:
+            self.version += 1
+
+    def get_or_compute(self, key, compute, historical=False):
+        if not historical:
+            # "week", "today"... move with the calendar even without new data
+            key = key + (date.today(),)
+        with self._lock:
+            version = self.version
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] in (None, version):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (None if historical else version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries),
+                    "version": self.version, "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
+
+
+def cached(historical=None, bucket=None):
+    """
+    Memoize a StatsManager query method in self.cache. historical is called
+    with the method's arguments and returns True when the result only covers
+    past days. bucket, for results relative to a time finer than the day
+    (e.g. the current hour), is called with the same arguments and returns
+    the id of the current time bucket, which becomes part of the key.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            if bucket is not None:
+                key = key + (bucket(*args, **kwargs),)
+            is_historical = historical is not None and historical(*args, **kwargs)
+            return self.cache.get_or_compute(key, lambda: fn(self, *args, **kwargs), is_historical)
+        return wrapper
+    return decorator
@@ -0,0 +1,73 @@
+import ctypes
+import threading
+from datetime import datetime, timedelta
+
+# Seconds to wait after startup before the first retention pass
+START_DELAY = 120
+
+# Seconds between retention passes
+RUN_INTERVAL = 6 * 3600
+
+# Seconds to yield between two folding chunks
+CHUNK_PAUSE = 0.5
+
+THREAD_PRIORITY_LOWEST = -2
+
+
+def _lower_thread_priority():
+    """Run the calling thread at the lowest priority (Windows only)."""
+    try:
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_LOWEST)
+    except Exception:
+        pass
+
+
+class RetentionJob(threading.Thread):
+    """
+    Background job that folds raw tickets older than retention_days into
+    hourly counts (see StatsStore.fold_steps), keeping file size, load time
+    and memory bounded on long-lived installs. Statistics are unaffected:
+    day rollups are kept as they are and ticket counts over whole hours,
+    days, weeks and months stay exact.
+
+    Work is done in small chunks with a pause in between, on a thread with
+    lowered priority, so it never competes with the UI.
+    """
+    def __init__(self, store, retention_days, interval=RUN_INTERVAL, start_delay=START_DELAY, pause=CHUNK_PAUSE):
+        super().__init__(daemon=True, name="StatsRetention")
+        self.store = store
+        self.retention_days = retention_days
+        self.interval = interval
+        self.start_delay = start_delay
+        self.pause = pause
+        self.folded = 0
+        self.last_run = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        _lower_thread_priority()
+        if self._stop_event.wait(self.start_delay):
+            return
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Stats retention error: {e}")
+            if self._stop_event.wait(self.interval):
+                return
+
+    def run_once(self):
+        """Fold everything before midnight retention_days ago."""
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).replace(hour=0, minute=0, second=0,
+                                                                                microsecond=0)
+        for folded in self.store.fold_steps(cutoff):
+            self.folded += folded
+            if self._stop_event.wait(self.pause):
+                return
+        self.last_run = datetime.now()
+
+    def stop(self, timeout=5):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,59 @@
+from typing import Sequence
+
+# Rolling windows (seconds) kept by InputMonitor: 1, 5 and 15 minutes
+ROLLING_WINDOWS = (60, 300, 900)
+
+
+class RollingCounter:
+    """
+    Event counts over the last N seconds for several windows at once.
+
+    A fixed ring of per-second counters sized for the largest window, plus
+    one running sum per window. Adding an event touches one slot and the
+    sums; moving to a new second subtracts the seconds that leave each
+    window. Memory is constant whatever the event rate, and both add() and
+    count() are O(1) (amortized over the seconds that pass).
+
+    Not thread-safe; InputMonitor calls it under its lock.
+    """
+    def __init__(self, windows: Sequence[int] = ROLLING_WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self.size = self.windows[-1]
+        self._counts = [0] * self.size
+        self._sums = [0] * len(self.windows)
+        self._newest = None # newest second in the ring
+
+    def _advance(self, second: int):
+        """Move the ring forward so second is the newest slot."""
+        if self._newest is None or second - self._newest >= self.size:
+            self._counts = [0] * self.size
+            self._sums = [0] * len(self.windows)
+            self._newest = second
+            return
+        counts = self._counts
+        for s in range(self._newest + 1, second + 1):
+            # Second s - w drops out of window w
+            for i, w in enumerate(self.windows):
+                self._sums[i] -= counts[(s - w) % self.size]
+            counts[s % self.size] = 0
+        self._newest = max(self._newest, second)
+
+    def add(self, timestamp: float, n=1):
+        """Count n events at timestamp (epoch seconds). Events older than every window are dropped."""
+        second = int(timestamp)
+        self._advance(second)
+        age = self._newest - second
+        if age >= self.size:
+            return
+        self._counts[second % self.size] += n
+        for i, w in enumerate(self.windows):
+            if age < w:
+                self._sums[i] += n
+
+    def count(self, window: int, now: float) -> int:
+        """Events in the last `window` seconds (one of self.windows) up to now."""
+        self._advance(int(now))
+        return self._sums[self.windows.index(window)]
+
+    def rate_per_minute(self, window: int, now: float) -> float:
+        return self.count(window, now) * 60 / window
@@ -0,0 +1,90 @@
+import math
+import threading
+from datetime import datetime
+from typing import Iterable, Optional
+
+# Half-life (seconds) of the exponentially weighted recent CPH
+PACE_HALF_LIFE = 30 * 60
+
+# Sessions shorter than this report 0 CPH instead of a huge ratio
+MIN_SESSION_SECONDS = 36
+
+
+class SessionPace:
+    """
+    Incremental pace of the current work session, fed by
+    StatsManager.log_ticket and read every second by CPHTracker.
+
+    Keeps the session count of replied tickets, an exponentially weighted
+    recent CPH and a projection of the volume reached by the end of the
+    shift. Both a new ticket and a read are O(1): the recent rate is a
+    single exponentially decayed ticket weight, brought forward to the
+    current time on read.
+    """
+    def __init__(self, half_life=PACE_HALF_LIFE):
+        self._tau = half_life / math.log(2)
+        self.session_start = datetime.now()
+        self.shift_end = None
+        self.count = 0
+        self._weight = 0.0 # sum of exp(-(last - t) / tau) over session tickets
+        self._last = None # time of the newest ticket, as epoch seconds
+        self._lock = threading.Lock()
+
+    def start(self, session_start: datetime, tickets: Iterable[datetime] = ()):
+        """Restart the session at session_start, replaying tickets already logged since then."""
+        with self._lock:
+            self.session_start = session_start
+            self.count = 0
+            self._weight = 0.0
+            self._last = None
+        for t in tickets:
+            self.add(t)
+
+    def set_shift_end(self, shift_end: Optional[datetime]):
+        """End of the shift from the schedule (None when unknown)."""
+        self.shift_end = shift_end
+
+    def add(self, timestamp: datetime):
+        """Count a ticket completed at timestamp."""
+        if timestamp < self.session_start:
+            return
+        ts = timestamp.timestamp()
+        with self._lock:
+            self.count += 1
+            if self._last is None:
+                self._weight = 1.0
+            else:
+                self._weight = self._weight * math.exp(-max(0.0, ts - self._last) / self._tau) + 1.0
+            self._last = max(ts, self._last or ts)
+
+    def _elapsed(self, now: datetime) -> float:
+        return (now - self.session_start).total_seconds()
+
+    def session_cph(self, now: Optional[datetime] = None) -> float:
+        """Tickets per hour since the session started."""
+        elapsed = self._elapsed(now or datetime.now())
+        if elapsed < MIN_SESSION_SECONDS:
+            return 0.0
+        return round(self.count / (elapsed / 3600), 2)
+
+    def recent_cph(self, now: Optional[datetime] = None) -> float:
+        """Exponentially weighted CPH, dominated by the last half-life or two."""
+        now = now or datetime.now()
+        elapsed = self._elapsed(now)
+        with self._lock:
+            weight, last = self._weight, self._last
+        if elapsed < MIN_SESSION_SECONDS or last is None:
+            return 0.0
+        weight *= math.exp(-max(0.0, now.timestamp() - last) / self._tau)
+        # Early in the session the kernel only covers `elapsed` seconds, not
+        # its full length, so scale up to avoid underestimating the rate
+        coverage = 1 - math.exp(-elapsed / self._tau)
+        return round(weight / (self._tau * coverage) * 3600, 2)
+
+    def projected_volume(self, now: Optional[datetime] = None) -> Optional[int]:
+        """Tickets expected by the end of the shift at the recent pace, or None without a shift end."""
+        now = now or datetime.now()
+        if self.shift_end is None:
+            return None
+        remaining = max(0.0, (self.shift_end - now).total_seconds()) / 3600
+        return int(round(self.count + self.recent_cph(now) * remaining))
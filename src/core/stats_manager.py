@@ -1,102 +1,143 @@
-import json
-import os
-from datetime import datetime, timedelta
-from typing import List, Dict, Union
-from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Mapping
+from .stats_store import create_store
+from .stats_writer import StatsWriter
+from .retention import RetentionJob
+from . import stats_vectorized
+from .query_cache import QueryCache, cached
+from .bucketing import granularity, hour_number
+from .session_pace import SessionPace
+
+# Metrics available from the day rollups, in StatsView display order
+METRICS = ("cph", "aht", "volume", "kpm", "cpm")
+
+# Row labels of the weekday/hour heatmap (weekday 0 is Monday)
+WEEKDAY_LABELS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+# Handle times (timed or gaps between completions) longer than this are breaks
+MAX_GAP_HANDLE_TIME = 2 * 3600
+
+# Handle-time percentiles shown by StatsView
+HANDLE_TIME_QUANTILES = (0.5, 0.9, 0.99)
+
+# Raw tickets older than this many days are folded into hourly counts
+# (0 keeps every raw ticket; folding is opt-in as it cannot be undone)
+RETENTION_DAYS = 0
+
+# Query results kept by the StatsManager cache
+QUERY_CACHE_SIZE = 256
+
+# Ranges with at least this many days of data use the NumPy aggregation path
+VECTORIZE_MIN_DAYS = 90
+
+def _before_today(start_date, end_date, *args, **kwargs):
+    """True when a date range ends before today, so its stats are final."""
+    return end_date is not None and end_date.date() < date.today()
+
+def _current_bucket(period="day", *args, **kwargs):
+    """Id of the period bucket containing now, so hour/shift results move on without new data."""
+    return granularity(period).from_datetime(datetime.now())
 
 class StatsManager:
-    def __init__(self, filepath="ticket_stats.json"):
+    """
+    Ticket and activity statistics on top of a pluggable storage backend.
+    
+    backend: "json" (snapshot + journal, default) or "sqlite" (indexed tables).
+    See stats_store.py for the backends. Mutations apply in memory at once and
+    are persisted by a StatsWriter thread that coalesces writes arriving
+    within flush_latency seconds.
+
+    Query results are memoized in a QueryCache; log_ticket and
+    update_activity bump its data version, except for ranges that end
+    before today which stay cached.
+
+    When retention_days is set, a RetentionJob folds raw tickets older than
+    that into hourly counts in the background (default 0: keep every raw
+    ticket).
+
+    pace is the SessionPace of the current work session (see start_session),
+    updated by log_ticket so the per-second CPH display never queries the store.
+    """
+    def __init__(self, filepath="ticket_stats.json", backend="json", flush_latency=0.5,
+                 cache_size=QUERY_CACHE_SIZE, retention_days=RETENTION_DAYS):
         self.filepath = filepath
-        self.data = self._load_data()
-        
-    def _load_data(self) -> Dict:
-        """Load data from JSON file, creating it if it doesn't exist."""
-        if os.path.exists(self.filepath):
-            try:
-                with open(self.filepath, 'r') as f:
-                    data = json.load(f)
-                    # Ensure structure
-                    if "tickets" not in data: data["tickets"] = []
-                    
-                    # Migration: Convert string timestamps to dicts
-                    migrated_tickets = []
-                    for t in data["tickets"]:
-                        if isinstance(t, str):
-                            migrated_tickets.append({"timestamp": t, "has_reply": True})
-                        else:
-                            migrated_tickets.append(t)
-                    data["tickets"] = migrated_tickets
-                    
-                    if "activity" not in data: data["activity"] = {}
-                    return data
-            except Exception as e:
-                print(f"Error loading stats: {e}")
-                return {"tickets": [], "activity": {}}
-        return {"tickets": [], "activity": {}}
-        
-    def _calculate_daily_metrics(self):
-        """Calculate and update derived metrics (CPH, AHT) for today."""
-        today = datetime.now().strftime("%Y-%m-%d")
-        if today not in self.data["activity"]:
-            return
-
-        stats = self.data["activity"][today]
-        duration_seconds = stats.get("duration", 0)
-        duration_hours = duration_seconds / 3600.0
+        self.backend = backend
+        self.cache = QueryCache(cache_size)
+        self.store = create_store(filepath, backend)
+        self.writer = StatsWriter(self.store, latency=flush_latency)
+        self.writer.start()
+        self.pace = SessionPace()
+        self.retention = None
+        if retention_days > 0:
+            self.retention = RetentionJob(self.store, retention_days)
+            self.retention.start()
         
-        # Count tickets for today
-        ticket_count = 0
-        for t in self.data["tickets"]:
-             # Handle both string and dict formats (though _load_data normalizes to dicts)
-            ts = t["timestamp"] if isinstance(t, dict) else t
-            if ts.startswith(today):
-                ticket_count += 1
-        
-        # Update stats
-        stats["ticket_count"] = ticket_count
-        
-        if duration_hours > 0:
-            stats["cph"] = round(ticket_count / duration_hours, 2)
-        else:
-            stats["cph"] = 0.0
-            
-        if ticket_count > 0:
-            stats["aht"] = round(duration_seconds / ticket_count, 2)
-        else:
-            stats["aht"] = 0.0
+    @property
+    def data(self) -> Mapping:
+        """
+        Read-only view of the stats in the old single-file layout (legacy
+        access, both backends). data["tickets"] is a list-of-dicts view built
+        only when that key is read.
+        """
+        return self.store.legacy_data()
 
-    def _save_data(self):
-        # Ensure metrics are up-to-date before saving
-        self._calculate_daily_metrics()
-        
-        with open(self.filepath, 'w') as f:
-            json.dump(self.data, f, indent=2)
+    def flush(self, timeout=None):
+        """Block until every logged ticket/activity delta is on disk."""
+        return self.writer.flush(timeout)
+
+    def get_writer_stats(self):
+        """Flush-latency counters of the background writer."""
+        return self.writer.get_stats()
+
+    def get_cache_stats(self):
+        """Hit/miss counters of the query cache."""
+        return self.cache.get_stats()
+
+    def close(self):
+        """Flush and release the storage backend (called on app shutdown)."""
+        if self.retention is not None:
+            self.retention.stop()
+        self.writer.stop()
+        self.store.close()
             
-    def log_ticket(self, has_reply=True):
-        """Log a ticket completion at the current time."""
-        timestamp = datetime.now().isoformat()
-        self.data["tickets"].append({"timestamp": timestamp, "has_reply": has_reply})
-        self._save_data()
-        return timestamp
+    def log_ticket(self, has_reply=True, handle_time=None):
+        """
+        Log a ticket completion at the current time.
+        handle_time: seconds spent on the ticket. Defaults to the gap since
+        the previous completion today. Either way a time longer than
+        MAX_GAP_HANDLE_TIME is a break, not a handle time, and is not recorded.
+        """
+        now = datetime.now()
+        if handle_time is not None and handle_time > MAX_GAP_HANDLE_TIME:
+            handle_time = None
+        elif handle_time is None:
+            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            last = self.store.last_ticket(today_start, now)
+            if last is not None and (now - last).total_seconds() <= MAX_GAP_HANDLE_TIME:
+                handle_time = (now - last).total_seconds()
+        self.store.add_ticket(now, has_reply, handle_time)
+        if has_reply:
+            # Session CPH counts replies only, like get_current_session_cph
+            self.pace.add(now)
+        self.cache.bump()
+        self.writer.notify()
+        return now.isoformat()
 
     def update_activity(self, keys, clicks, duration_seconds):
-        """Update activity stats for today."""
-        today = datetime.now().strftime("%Y-%m-%d")
-        if today not in self.data["activity"]:
-            self.data["activity"][today] = {"keys": 0, "clicks": 0, "duration": 0}
-            
-        self.data["activity"][today]["keys"] += keys
-        self.data["activity"][today]["clicks"] += clicks
-        self.data["activity"][today]["duration"] += duration_seconds
-        self._save_data()
+        """Update activity stats for today (and the current hour's heatmap bucket)."""
+        now = datetime.now()
+        self.store.add_activity(now.strftime("%Y-%m-%d"), keys, clicks, duration_seconds, now.hour)
+        self.cache.bump()
+        self.writer.notify()
 
+    @cached()
     def get_activity_stats(self, period="today"):
         """Get activity stats for a period (today, week, month)."""
         now = datetime.now()
         today_str = now.strftime("%Y-%m-%d")
         
         if period == "today":
-            return self.data["activity"].get(today_str, {"keys": 0, "clicks": 0, "duration": 0})
+            return self.store.get_activity(today_str)
             
         start_date = None
         if period == "week":
@@ -105,21 +146,11 @@ class StatsManager:
             start_date = now.replace(day=1)
             
         if start_date:
-            total_keys = 0
-            total_clicks = 0
-            total_duration = 0
-            
-            for date_str, stats in self.data["activity"].items():
-                date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-                if date_obj >= start_date.replace(hour=0, minute=0, second=0, microsecond=0):
-                    total_keys += stats.get("keys", 0)
-                    total_clicks += stats.get("clicks", 0)
-                    total_duration += stats.get("duration", 0)
-                    
-            return {"keys": total_keys, "clicks": total_clicks, "duration": total_duration}
+            return self.store.activity_totals(start_date.strftime("%Y-%m-%d"))
             
         return {"keys": 0, "clicks": 0, "duration": 0}
 
+    @cached()
     def get_average_kpm(self, period="week"):
         """Calculate average KPM for a period."""
         stats = self.get_activity_stats(period)
@@ -127,6 +158,7 @@ class StatsManager:
         if minutes < 1: return 0
         return int(stats["keys"] / minutes)
 
+    @cached()
     def get_average_clicks_per_minute(self, period="week"):
         """Calculate average Clicks/Min for a period."""
         stats = self.get_activity_stats(period)
@@ -135,61 +167,38 @@ class StatsManager:
         return int(stats["clicks"] / minutes)
 
         
+    @cached(_before_today)
     def get_tickets_for_range(self, start_date, end_date):
-        """Get tickets between start_date and end_date (inclusive)."""
-        tickets = []
-        for ticket in self.data["tickets"]:
-            # Handle potential legacy data if _load_data didn't catch it (safety)
-            if isinstance(ticket, str):
-                t_str = ticket
-            else:
-                t_str = ticket["timestamp"]
-                
-            t = datetime.fromisoformat(t_str)
-            if start_date <= t <= end_date:
-                tickets.append(t)
-        return tickets
+        """
+        Get tickets between start_date and end_date (inclusive). Tickets
+        folded by retention are reported at the start of their hour.
+        """
+        return self.store.get_tickets(start_date, end_date)
         
+    @cached()
     def get_daily_stats(self):
         """Return dictionary of {date_str: count}."""
-        stats = defaultdict(int)
-        for ticket in self.data["tickets"]:
-            if isinstance(ticket, str):
-                t_str = ticket
-                has_reply = True
-            else:
-                t_str = ticket["timestamp"]
-                has_reply = ticket.get("has_reply", True)
-            
-            if has_reply:
-                date_str = t_str.split('T')[0]
-                stats[date_str] += 1
-        return dict(stats)
+        return self.store.daily_counts()
         
+    def start_session(self, session_start_time):
+        """(Re)start the session pace, seeded with the replies logged since session_start_time."""
+        self.pace.start(session_start_time, self.store.get_tickets(session_start_time, replies_only=True))
+        return self.pace
+
     def get_current_session_cph(self, session_start_time):
         """Calculate CPH for the current session."""
         now = datetime.now()
         duration_hours = (now - session_start_time).total_seconds() / 3600
         
         # Count tickets since session start
-        count = 0
-        for ticket in self.data["tickets"]:
-            if isinstance(ticket, str):
-                t_str = ticket
-                has_reply = True
-            else:
-                t_str = ticket["timestamp"]
-                has_reply = ticket.get("has_reply", True)
-                
-            t = datetime.fromisoformat(t_str)
-            if t >= session_start_time and has_reply:
-                count += 1
+        count = self.store.count_tickets(session_start_time)
                 
         if duration_hours < 0.01: # Avoid division by zero or tiny numbers
             return 0.0
             
         return round(count / duration_hours, 2)
         
+    @cached()
     def get_average_cph_per_day(self):
         """Calculate average tickets per day (for days with activity)."""
         daily = self.get_daily_stats()
@@ -204,65 +213,28 @@ class StatsManager:
         # We will return tickets/day for now as a proxy or "Daily Volume".
         return round(total_tickets / total_days, 1)
 
+    @cached()
     def get_weekly_stats(self):
         """Return tickets count for current week."""
         now = datetime.now()
         start_of_week = now - timedelta(days=now.weekday())
         start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        count = 0
-        for ticket in self.data["tickets"]:
-            if isinstance(ticket, str):
-                t_str = ticket
-                has_reply = True
-            else:
-                t_str = ticket["timestamp"]
-                has_reply = ticket.get("has_reply", True)
-                
-            t = datetime.fromisoformat(t_str)
-            if t >= start_of_week and has_reply:
-                count += 1
-        return count
+        return self.store.count_tickets(start_of_week)
 
+    @cached()
     def get_monthly_stats(self):
         """Return tickets count for current month."""
         now = datetime.now()
         start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        count = 0
-        for ticket in self.data["tickets"]:
-            if isinstance(ticket, str):
-                t_str = ticket
-                has_reply = True
-            else:
-                t_str = ticket["timestamp"]
-                has_reply = ticket.get("has_reply", True)
-                
-            t = datetime.fromisoformat(t_str)
-            if t >= start_of_month and has_reply:
-                count += 1
-        return count
+        return self.store.count_tickets(start_of_month)
 
+    @cached()
     def get_first_ticket_time_today(self):
         """Return the datetime of the first ticket logged today, or None."""
-        today = datetime.now().date()
-        first_time = None
-        
-        for ticket in self.data["tickets"]:
-            if isinstance(ticket, str):
-                t_str = ticket
-            else:
-                t_str = ticket["timestamp"]
-            
-            try:
-                t = datetime.fromisoformat(t_str)
-                if t.date() == today:
-                    if first_time is None or t < first_time:
-                        first_time = t
-            except ValueError:
-                continue
-        return first_time
+        today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return self.store.first_ticket(today_start, today_start + timedelta(days=1) - timedelta(microseconds=1))
 
+    @cached()
     def get_daily_volume_list(self, days=7):
         """Return list of (date_str, count) tuples for the last N days."""
         daily_counts = self.get_daily_stats() # Returns {date: count}
@@ -277,189 +249,132 @@ class StatsManager:
             
         return result
 
+    def _metric_value(self, metric, t_count, dur_sec, total_keys, total_clicks):
+        """Compute a chart metric from one bucket's totals."""
+        val = 0.0
+        if metric == "volume":
+            val = t_count
+        elif metric == "cph":
+            hours = dur_sec / 3600
+            if hours > 0.1: val = round(t_count / hours, 1)
+        elif metric == "aht":
+            # Average Handle Time (Minutes)
+            if t_count > 0: val = round((dur_sec / 60) / t_count, 1)
+        elif metric == "kpm":
+            minutes = dur_sec / 60
+            if minutes > 1: val = round(total_keys / minutes, 1)
+        elif metric == "cpm":
+            minutes = dur_sec / 60
+            if minutes > 1: val = round(total_clicks / minutes, 1)
+        return val
+
+    def _table(self, g, buckets, first_day, last_day, metrics=METRICS):
+        """
+        Sum the rollups between first_day and last_day into the consecutive
+        bucket ids `buckets` of granularity g and compute the requested metrics.
+        Returns: {"labels": [...], metric: [...]} in bucket order.
+        Day-aligned granularities read the per-day rollups, hour and shift
+        buckets the per-hour ones. Cost is O(days in range), independent of
+        how many tickets exist.
+        """
+        start_str, end_str = first_day.strftime("%Y-%m-%d"), last_day.strftime("%Y-%m-%d")
+        if g.daily:
+            rollups = self.store.get_day_rollups(start_str, end_str)
+        else:
+            rollups = self.store.get_hour_rollups(start_str, end_str)
+
+        starts = [g.start(b) for b in buckets]
+        if g.daily and stats_vectorized.available() and len(rollups) >= VECTORIZE_MIN_DAYS:
+            # Long ranges: bin the day columns with NumPy
+            table = stats_vectorized.aggregate(rollups, [d.date() for d in starts], metrics)
+        else:
+            first = buckets.start
+            sums = [[0, 0.0, 0, 0] for _ in buckets] # tickets, duration, keys, clicks
+            for key, row in rollups.items():
+                if g.daily:
+                    bucket = g.from_ordinal(date.fromisoformat(key).toordinal())
+                else:
+                    bucket = g.from_hour(hour_number(date.fromisoformat(key[0]).toordinal(), key[1]))
+                i = bucket - first
+                if not 0 <= i < len(sums): # Only count if in range
+                    continue
+                totals = sums[i]
+                totals[0] += row["replies"]
+                totals[1] += row["duration"]
+                totals[2] += row["keys"]
+                totals[3] += row["clicks"]
+            table = {metric: [self._metric_value(metric, *totals) for totals in sums] for metric in metrics}
+
+        table["labels"] = [g.format_label(d) for d in starts]
+        return table
+
+    @cached(_before_today)
+    def get_stats_table(self, start_date: datetime, end_date: datetime, period="day"):
+        """
+        Get every metric for a date range in a single aggregation pass.
+        period: any name in bucketing.GRANULARITIES ('hour', 'shift', 'day', 'week', 'month')
+        Returns: {"labels": [...], "cph": [...], "aht": [...], "volume": [...],
+                  "kpm": [...], "cpm": [...]} with one entry per bucket.
+        """
+        g = granularity(period)
+        return self._table(g, g.span(start_date, end_date), start_date, end_date)
+
+    @cached(_before_today)
+    def get_handle_time_percentiles(self, start_date: datetime, end_date: datetime, quantiles=HANDLE_TIME_QUANTILES):
+        """
+        Handle-time percentiles (seconds) over a date range, from the merged
+        per-day sketches.
+        Returns: {"count": n, "p50": ..., "p90": ..., "p99": ...}
+        """
+        sketch = self.store.handle_time_sketch(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+        result = {"count": sketch.count}
+        for q in quantiles:
+            result[f"p{q * 100:g}"] = round(sketch.quantile(q), 1)
+        return result
+
+    @cached(_before_today)
+    def get_hourly_heatmap(self, start_date: datetime, end_date: datetime, metric="cph"):
+        """
+        Metric by weekday and hour of day over a date range, from the hour
+        buckets kept as tickets and activity arrive.
+        Returns: {"weekdays": [7 labels], "hours": [0..23], "values": 7x24 rows}
+        Cost is O(days in range), independent of how many tickets exist.
+        """
+        rollups = self.store.get_hour_rollups(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
+        cells = [[[0, 0.0, 0, 0] for _ in range(24)] for _ in WEEKDAY_LABELS]
+        for (date_str, hour), row in rollups.items():
+            totals = cells[date.fromisoformat(date_str).weekday()][hour]
+            totals[0] += row["replies"]
+            totals[1] += row["duration"]
+            totals[2] += row["keys"]
+            totals[3] += row["clicks"]
+        values = [[self._metric_value(metric, *totals) for totals in day] for day in cells]
+        return {"weekdays": list(WEEKDAY_LABELS), "hours": list(range(24)), "values": values}
+
+    @cached(_before_today)
     def get_stats_range(self, start_date: datetime, end_date: datetime, period="day", metric="cph"):
         """
         Get stats for a specific date range.
+        period: any name in bucketing.GRANULARITIES ('hour', 'shift', 'day', 'week', 'month')
         Returns: list of (label, value) tuples
         """
-        data_points = []
-        
-        # 1. Gather raw data (tickets and duration) grouped by period key
-        grouped_tickets = defaultdict(int)
-        grouped_duration = defaultdict(float) # seconds
-        grouped_keys = defaultdict(int) 
-        grouped_clicks = defaultdict(int)
-        period_keys = [] 
-        key_labels = {}
-        
-        # Helper to generate keys
-        def get_key(date_obj, p):
-            if p == "day":
-                return date_obj.strftime("%Y-%m-%d")
-            elif p == "week":
-                year, week, _ = date_obj.isocalendar()
-                return f"{year}-W{week:02d}"
-        
-        # Generate target keys (x-axis)
-        curr = start_date
-        while curr <= end_date:
-            k = get_key(curr, period)
-            if k not in period_keys:
-                period_keys.append(k)
-                if period == "day":
-                    key_labels[k] = curr.strftime("%a %d")
-                else:
-                    y, w, _ = curr.isocalendar()
-                    key_labels[k] = f"Wk {w}"
-            curr += timedelta(days=1)
-                
-        # Fill Aggregates
-        # 1. Tickets
-        for ticket in self.data["tickets"]:
-            if isinstance(ticket, str): t_str = ticket; has_reply = True
-            else: t_str = ticket["timestamp"]; has_reply = ticket.get("has_reply", True)
-            
-            if not has_reply: continue
-            
-            try:
-                t_date = datetime.fromisoformat(t_str)
-                # Filter strictly by date range
-                if start_date <= t_date <= end_date + timedelta(days=1): # inclusive enough
-                    k = get_key(t_date, period)
-                    if k in period_keys: # Only count if in list (safety)
-                        grouped_tickets[k] += 1
-            except: continue
-            
-        # 2. Duration (from activity)
-        # activity keys are always YYYY-MM-DD
-        for date_str, act_data in self.data["activity"].items():
-            try:
-                date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-                if start_date.date() <= date_obj.date() <= end_date.date():
-                    target_k = get_key(date_obj, period)
-                    grouped_duration[target_k] += act_data.get("duration", 0)
-                    grouped_keys[target_k] += act_data.get("keys", 0)
-                    grouped_clicks[target_k] += act_data.get("clicks", 0)
-            except: continue
-            
-        # Calc Metric
-        for k in period_keys:
-            t_count = grouped_tickets[k]
-            dur_sec = grouped_duration[k]
-            total_keys = grouped_keys[k]
-            total_clicks = grouped_clicks[k]
-            val = 0.0
-            
-            if metric == "volume":
-                val = t_count
-            elif metric == "cph":
-                hours = dur_sec / 3600
-                if hours > 0.1: val = round(t_count / hours, 1)
-                else: val = 0.0
-            elif metric == "aht":
-                # Average Handle Time (Minutes)
-                if t_count > 0: val = round((dur_sec / 60) / t_count, 1)
-                else: val = 0.0
-            elif metric == "kpm": 
-                 minutes = dur_sec / 60
-                 if minutes > 1: val = round(total_keys / minutes, 1)
-            elif metric == "cpm":
-                 minutes = dur_sec / 60
-                 if minutes > 1: val = round(total_clicks / minutes, 1)
-                
-            data_points.append((key_labels[k], val))
-            
-        return data_points
+        g = granularity(period)
+        table = self._table(g, g.span(start_date, end_date), start_date, end_date, (metric,))
+        return list(zip(table["labels"], table[metric]))
 
+    @cached(bucket=_current_bucket)
     def get_aggregated_stats(self, period="day", metric="cph", count=14):
         """
-        Get stats aggregated by day or week.
-        period: 'day' or 'week'
-        metric: 'cph', 'aht', 'volume'
+        Get stats for the last `count` buckets of a period, oldest first.
+        period: any name in bucketing.GRANULARITIES ('hour', 'shift', 'day', 'week', 'month')
+        metric: 'cph', 'aht', 'volume', 'kpm', 'cpm'
         Returns: list of (label, value) tuples
         """
-        now = datetime.now()
-        data_points = []
-        
-        # 1. Gather raw data (tickets and duration) grouped by period key
-        grouped_tickets = defaultdict(int)
-        grouped_duration = defaultdict(float) # seconds
-        period_keys = [] # To maintain order
-        key_labels = {}
-        
-        # Helper to generate keys
-        def get_key(date_obj, p):
-            if p == "day":
-                return date_obj.strftime("%Y-%m-%d")
-            elif p == "week":
-                year, week, _ = date_obj.isocalendar()
-                return f"{year}-W{week:02d}"
-        
-        # Generate target keys (x-axis)
-        if period == "day":
-            for i in range(count - 1, -1, -1):
-                d = now - timedelta(days=i)
-                k = get_key(d, "day")
-                period_keys.append(k)
-                key_labels[k] = d.strftime("%a %d") # Mon 23
-        elif period == "week":
-            # For weeks, start from current week and go back
-            current_iso = now.isocalendar() # (year, week, day)
-            # Need strict math for weeks. 
-            # Simple approach: Iterate back by 7 days 'count' times
-            curr = now
-            for i in range(count):
-                k = get_key(curr, "week")
-                period_keys.insert(0, k) # Prepend
-                # Label: "Wk 46"
-                y, w, _ = curr.isocalendar()
-                key_labels[k] = f"Wk {w}"
-                curr -= timedelta(days=7)
-                
-        # Fill Aggregates
-        # 1. Tickets
-        for ticket in self.data["tickets"]:
-            if isinstance(ticket, str): t_str = ticket; has_reply = True
-            else: t_str = ticket["timestamp"]; has_reply = ticket.get("has_reply", True)
-            
-            if not has_reply: continue
-            
-            try:
-                t_date = datetime.fromisoformat(t_str)
-                k = get_key(t_date, period)
-                if k in period_keys: # Only count if in range
-                    grouped_tickets[k] += 1
-                # If we asked for 7 days but have data for older keys not in list, ignore
-            except: continue
-            
-        # 2. Duration (from activity)
-        # activity keys are always YYYY-MM-DD
-        for date_str, act_data in self.data["activity"].items():
-            try:
-                date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-                target_k = get_key(date_obj, period)
-                # If this day belongs to one of our target weeks/days
-                if target_k in period_keys: # simplistic check
-                    grouped_duration[target_k] += act_data.get("duration", 0)
-            except: continue
-            
-        # Calc Metric
-        for k in period_keys:
-            t_count = grouped_tickets[k]
-            dur_sec = grouped_duration[k]
-            val = 0.0
-            
-            if metric == "volume":
-                val = t_count
-            elif metric == "cph":
-                hours = dur_sec / 3600
-                if hours > 0.1: val = round(t_count / hours, 1)
-                else: val = 0.0
-            elif metric == "aht":
-                # Average Handle Time (Minutes)
-                if t_count > 0: val = round((dur_sec / 60) / t_count, 1)
-                else: val = 0.0
-                
-            data_points.append((key_labels[k], val))
-            
-        return data_points
+        g = granularity(period)
+        current = g.from_datetime(datetime.now())
+        buckets = range(current - count + 1, current + 1)
+        # Whole buckets: the current week or month includes its remaining days
+        first_day = g.start(buckets.start)
+        last_day = g.start(current + 1) - timedelta(microseconds=1)
+        table = self._table(g, buckets, first_day, last_day, (metric,))
+        return list(zip(table["labels"], table[metric]))
@@ -0,0 +1,1195 @@
+import hashlib
+import math
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+from .day_totals import DayTotals
+from .handle_sketch import HandleTimeSketch
+from .ticket_index import HourlyIndex, LegacyData, TicketIndex, TicketRows
+
+# Number of journal records after which the journal is folded into the snapshot
+JOURNAL_COMPACT_THRESHOLD = 500
+
+# Number of last-good snapshots kept next to ticket_stats.json
+SNAPSHOT_BACKUPS = 3
+
+# On-disk layout version of ticket_stats.json (see JsonStatsStore._migrate)
+#   0: single file, tickets may be bare ISO strings
+#   1: ticket dicts plus per-day rollups in "daily"
+#   2: tickets moved to monthly partition files
+#   3: per-day handle-time sketches in "handle_times"
+#   4: per-day hour-of-day buckets in "hours"
+SCHEMA_VERSION = 4
+
+# PRAGMA user_version of ticket_stats.db (see SqliteStatsStore._migrate)
+SQLITE_SCHEMA_VERSION = 5
+
+# Columns of an hour bucket row in data["hours"][date_str][hour]
+HOUR_FIELDS = ("replies", "no_replies", "keys", "clicks", "duration")
+
+# Tickets folded per SQLite transaction by the retention job
+FOLD_BATCH = 5000
+
+# Month partitions kept in memory at once (current months are never dropped)
+MAX_RESIDENT_PARTITIONS = 6
+
+# Snapshot checksum is stored as the final key of the JSON object
+CHECKSUM_MARKER = ',\n  "checksum": '
+
+
+def _empty_activity():
+    return {"keys": 0, "clicks": 0, "duration": 0}
+
+
+def _fsync_dir(path):
+    """Persist a rename by syncing the parent directory (no-op on Windows)."""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _date_range(start_str, end_str):
+    """Yield every "YYYY-MM-DD" string from start_str to end_str inclusive."""
+    day = date.fromisoformat(start_str)
+    last = date.fromisoformat(end_str)
+    while day <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def _rollup(replies=0, no_replies=0, activity=None):
+    """Per-day rollup row: ticket counts plus that day's activity totals."""
+    activity = activity or {}
+    return {"replies": replies, "no_replies": no_replies,
+            "duration": activity.get("duration", 0), "keys": activity.get("keys", 0),
+            "clicks": activity.get("clicks", 0)}
+
+
+class StatsStore:
+    """
+    Storage backend interface used by StatsManager.
+
+    Backends own persistence and the primitive range queries; StatsManager
+    builds the public statistics on top of them. Date strings are always
+    local "YYYY-MM-DD", datetimes are naive local time.
+    """
+    def add_ticket(self, timestamp: datetime, has_reply: bool, handle_time: Optional[float] = None):
+        """Store a ticket; handle_time (seconds) also feeds that day's handle-time sketch."""
+        raise NotImplementedError
+
+    def add_activity(self, date_str: str, keys, clicks, duration, hour: Optional[int] = None):
+        """Add an activity delta to a day; hour (0-23) also feeds that hour's bucket."""
+        raise NotImplementedError
+
+    def get_tickets(self, start: datetime, end: Optional[datetime] = None, replies_only=False) -> List[datetime]:
+        """Ticket times with start <= t <= end (end=None means open-ended)."""
+        raise NotImplementedError
+
+    def count_tickets(self, start: datetime, end: Optional[datetime] = None, replies_only=True) -> int:
+        raise NotImplementedError
+
+    def first_ticket(self, start: datetime, end: datetime) -> Optional[datetime]:
+        raise NotImplementedError
+
+    def last_ticket(self, start: datetime, end: datetime) -> Optional[datetime]:
+        raise NotImplementedError
+
+    def handle_time_sketch(self, start_str: str, end_str: str) -> HandleTimeSketch:
+        """Merged handle-time sketch of every day in [start_str, end_str]."""
+        raise NotImplementedError
+
+    def daily_counts(self) -> Dict[str, int]:
+        """Return {date_str: reply count} for every day with replies."""
+        raise NotImplementedError
+
+    def get_activity(self, date_str: str) -> Dict:
+        raise NotImplementedError
+
+    def get_activity_range(self, start_str: str, end_str: Optional[str] = None) -> Dict[str, Dict]:
+        """Return {date_str: activity} for start_str <= date <= end_str."""
+        raise NotImplementedError
+
+    def activity_totals(self, start_str: str, end_str: Optional[str] = None) -> Dict:
+        """Return {"keys", "clicks", "duration"} summed over start_str <= date <= end_str."""
+        raise NotImplementedError
+
+    def get_day_rollups(self, start_str: str, end_str: str) -> Dict[str, Dict]:
+        """
+        Return {date_str: rollup} for days with data in [start_str, end_str].
+        A rollup holds replies, no_replies, duration, keys and clicks.
+        """
+        raise NotImplementedError
+
+    def get_hour_rollups(self, start_str: str, end_str: str) -> Dict[Tuple[str, int], Dict]:
+        """
+        Return {(date_str, hour): rollup} for hours with data in
+        [start_str, end_str], in ascending order. Cost depends on the number
+        of days, not tickets.
+        """
+        raise NotImplementedError
+
+    def legacy_data(self) -> LegacyData:
+        """Read-only view in the old single-file data layout; "tickets" lists raw tickets on access."""
+        raise NotImplementedError
+
+    def fold_steps(self, cutoff: datetime):
+        """
+        Fold raw tickets older than cutoff into hourly counts (retention),
+        in chunks. Yields the number of tickets folded by each chunk.
+        """
+        return iter(())
+
+    def flush(self):
+        """Persist every mutation applied so far (called by StatsWriter)."""
+        pass
+
+    def close(self):
+        pass
+
+
+def _schema_version(data) -> int:
+    """Schema version of a snapshot; files written before stamping (v0-v2) are recognized by shape."""
+    if "schema_version" in data:
+        return data["schema_version"]
+    if "partitions" in data:
+        return 2
+    if "daily" in data:
+        return 1
+    return 0
+
+
+def _backup_path(path, n):
+    return f"{path}.bak{n}"
+
+
+def _read_snapshot(path) -> Dict:
+    """Parse a snapshot file and verify its checksum (raises if invalid)."""
+    with open(path, 'r') as f:
+        text = f.read()
+    data = json.loads(text)
+    checksum = data.pop("checksum", None)
+    if checksum is not None:
+        # The checksum covers the file body written before it (see _write_snapshot)
+        body = text[:text.rfind(CHECKSUM_MARKER)] + "\n}"
+        if hashlib.sha256(body.encode("utf-8")).hexdigest() != checksum:
+            raise ValueError("checksum mismatch")
+    return data
+
+
+def _load_snapshot(path, backups, read_only=False) -> Tuple[Optional[Dict], bool]:
+    """
+    Load the newest valid snapshot: the live file first, then the rotated
+    backups. Returns (data, recovered), recovered being True when data
+    comes from a backup; data is None if there is no readable snapshot.
+    A damaged live file is set aside unless read_only.
+    """
+    for candidate in [path] + [_backup_path(path, n) for n in range(1, backups + 1)]:
+        if not os.path.exists(candidate):
+            continue
+        try:
+            data = _read_snapshot(candidate)
+        except Exception as e:
+            print(f"Error loading stats from {candidate}: {e}")
+            if candidate == path and not read_only:
+                # Keep the damaged file for manual recovery; it must not
+                # be rotated into the backups by the next compaction
+                corrupt_path = f"{path}.corrupt-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                try:
+                    os.replace(path, corrupt_path)
+                except OSError:
+                    pass
+            continue
+        if candidate != path:
+            print(f"Recovered stats from backup snapshot {candidate}")
+        return data, candidate != path
+    return None, False
+
+
+def _write_snapshot(path, snapshot: str, backups):
+    """Atomically replace path with snapshot plus checksum, rotating backups."""
+    # Append the checksum as the last key so the file stays plain JSON
+    digest = hashlib.sha256(snapshot.encode("utf-8")).hexdigest()
+    text = snapshot[:-1].rstrip() + CHECKSUM_MARKER + f'"{digest}"\n}}'
+
+    # Write to a temp file and fsync so a crash never leaves a torn snapshot
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Rotate last-good snapshots: live -> bak1 -> bak2 ...
+    if backups > 0 and os.path.exists(path):
+        for n in range(backups, 1, -1):
+            if os.path.exists(_backup_path(path, n - 1)):
+                os.replace(_backup_path(path, n - 1), _backup_path(path, n))
+        os.replace(path, _backup_path(path, 1))
+    os.replace(tmp_path, path)
+    _fsync_dir(path)
+
+
+def _month_key(dt: datetime) -> str:
+    return dt.strftime("%Y-%m")
+
+
+class TicketPartition:
+    """
+    Tickets of one calendar month ("YYYY-MM"): raw tickets as TicketIndex
+    columns plus, once the retention job has run, older tickets folded into
+    an HourlyIndex. Queries combine both.
+
+    journal_seq is the newest journal record contained in the partition, so
+    a replayed record is applied to it at most once. `version` changes on
+    every add; the partition is dirty until that version has been saved.
+    """
+    def __init__(self, month, tickets=(), journal_seq=0, hourly=()):
+        self.month = month
+        self.journal_seq = journal_seq
+        self.version = 0
+        self.saved_version = 0
+        self.index = TicketIndex()
+        for t in tickets:
+            self.index.add(datetime.fromisoformat(t["timestamp"]).timestamp(), t.get("has_reply", True),
+                           t.get("handle_time"))
+        self.hourly = HourlyIndex()
+        if hourly:
+            self.hourly.merge({datetime.fromisoformat(h).timestamp(): [r, n] for h, r, n in hourly})
+
+    def __len__(self):
+        return len(self.index) + len(self.hourly)
+
+    @property
+    def dirty(self):
+        return self.version != self.saved_version
+
+    def add(self, timestamp: str, has_reply: bool, seq=0, handle_time=None):
+        self.index.add(datetime.fromisoformat(timestamp).timestamp(), has_reply, handle_time)
+        self.journal_seq = max(self.journal_seq, seq)
+        self.version += 1
+
+    def fold(self, cutoff_ts: float) -> int:
+        """Move raw tickets older than cutoff_ts into hour buckets; returns how many."""
+        old = self.index
+        n = bisect_left(old.times, cutoff_ts)
+        if n == 0:
+            return 0
+        counts = {}
+        for i in range(n):
+            hour = datetime.fromtimestamp(old.times[i]).replace(minute=0, second=0, microsecond=0).timestamp()
+            bucket = counts.setdefault(hour, [0, 0])
+            bucket[0 if old.replies[i] else 1] += 1
+        index = TicketIndex()
+        for i in range(n, len(old)):
+            handle = old.handle_times[i] if old.handle_times is not None else math.nan
+            index.add(old.times[i], old.replies[i], None if math.isnan(handle) else handle)
+        hourly = HourlyIndex()
+        hourly.merge(dict(zip(self.hourly.hours, zip(self.hourly.replies, self.hourly.no_replies))))
+        hourly.merge(counts)
+        self.index, self.hourly = index, hourly
+        self.version += 1
+        return n
+
+    def count(self, start, end, replies_only):
+        return self.index.count(start, end, replies_only) + self.hourly.count(start, end, replies_only)
+
+    def tickets(self, start, end, replies_only):
+        # Folded buckets are always older than the remaining raw tickets
+        return self.hourly.tickets(start, end, replies_only) + self.index.tickets(start, end, replies_only)
+
+    def first(self, start, end):
+        return self.hourly.first(start, end) or self.index.first(start, end)
+
+    def last(self, start, end):
+        return self.index.last(start, end) or self.hourly.last(start, end)
+
+    def to_json(self) -> str:
+        data = {"month": self.month, "journal_seq": self.journal_seq,
+                "tickets": list(TicketRows([self.index]))}
+        if len(self.hourly):
+            data["hourly"] = self.hourly.buckets()
+        return json.dumps(data, indent=2)
+
+
+class JsonStatsStore(StatsStore):
+    """
+    JSON snapshot (ticket_stats.json) plus an append-only journal
+    (ticket_stats.journal) holding one record per mutation. Logging a ticket
+    only appends a single line; the journal is replayed over the snapshot on
+    startup and periodically compacted back into it.
+
+    Mutations are applied in memory immediately and buffered; flush() appends
+    the buffered records to the journal in one write and fsyncs it. StatsWriter
+    calls flush() from its own thread so the UI never waits on the disk.
+
+    Snapshots are written atomically (temp file, fsync, rename) with a SHA-256
+    checksum, and the previous `backups` snapshots are kept as .bak1, .bak2...
+    Journal records carry a CRC32. On load a damaged snapshot falls back to the
+    newest valid backup instead of starting empty.
+
+    Raw tickets live in per-month partitions (ticket_stats_partitions/YYYY-MM.json).
+    The main snapshot only holds the per-day rollups, activity and the list
+    of partitions, so startup cost does not grow with history. The partitions
+    of the current week and month are loaded eagerly; older months are loaded
+    when a range query reaches them and at most `max_partitions` of those stay
+    in memory (least recently used are dropped first).
+
+    Per-day hour buckets (data["hours"]) count tickets and activity by hour
+    of day as they arrive, for the weekday/hour heatmap. Activity recorded
+    before schema v4 has no hour and is only in the day totals.
+
+    The snapshot carries a schema_version. Files from older versions are
+    migrated once on load and saved with the new version, so a normal
+    startup does no per-ticket normalization. With read_only the files are
+    never written (no migration save, compaction, or setting aside a damaged
+    snapshot); the SQLite backend imports a JSON history this way.
+
+    Concurrency: writers (the Tk thread logging tickets, the InputMonitor
+    save thread, the retention job) serialize on _lock. Day buckets in
+    data["daily"] / data["activity"] and the handle-time sketches are
+    copy-on-write: a writer publishes a new bucket instead of mutating the
+    old one, and a new day swaps in a new outer map, so readers use them
+    without locking and never see a half-applied update. Ticket index and
+    prefix-sum reads are O(log n) and take _lock.
+    """
+    def __init__(self, filepath="ticket_stats.json", compact_threshold=JOURNAL_COMPACT_THRESHOLD,
+                 backups=SNAPSHOT_BACKUPS, max_partitions=MAX_RESIDENT_PARTITIONS, read_only=False):
+        self.filepath = filepath
+        self.read_only = read_only
+        self.journal_path = os.path.splitext(filepath)[0] + ".journal"
+        self.partition_dir = os.path.splitext(filepath)[0] + "_partitions"
+        self.compact_threshold = compact_threshold
+        self.backups = backups
+        self.max_partitions = max_partitions
+        self._journal_records = 0
+        self._pending = []
+        # Resident partitions in least-recently-used order
+        self._partitions = OrderedDict()
+        # Activity prefix sums, built once replay has settled data["activity"]
+        self.totals = None
+        self._shared = False
+        # Months rebuilt from partition files while recovering a backup (see _recover_partitions)
+        self._rebuilt = {}
+        # _lock guards the in-memory data, _io_lock serializes file writes
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self.data = self._load_data()
+
+        version = _schema_version(self.data)
+        if version > SCHEMA_VERSION:
+            print(f"Stats file {filepath} has schema version {version}, newer than supported {SCHEMA_VERSION}")
+        migrated = version < SCHEMA_VERSION
+        if migrated:
+            self._migrate(version)
+        # Sketch objects live outside data and are serialized on save
+        self.sketches = {d: HandleTimeSketch.from_dict(v) for d, v in self.data.pop("handle_times", {}).items()}
+
+        if self._recovered:
+            self._rebuilt = self._recover_partitions()
+        self._replay_journal()
+        if self._rebuilt:
+            # Continue the sequence after the newest record in a partition,
+            # which would otherwise treat new records as already applied
+            self.data["journal_seq"] = max(self.data.get("journal_seq", 0), *self._rebuilt.values())
+        self._rebuilt = {}
+        if migrated:
+            # Stamp the new version so the migration never runs again
+            self._save_data()
+        for month in self._pinned_months():
+            self._partition(month)
+
+        self.totals = DayTotals()
+        for date_str, day in self.data["activity"].items():
+            self.totals.add(date.fromisoformat(date_str), day.get("keys", 0), day.get("clicks", 0), day.get("duration", 0))
+        # From here on other threads may read: copy-on-write for new keys
+        self._shared = True
+
+    def _partition_path(self, month):
+        return os.path.join(self.partition_dir, f"{month}.json")
+
+    def _load_data(self) -> Dict:
+        """Load the main snapshot, creating an empty store if there is none."""
+        data, self._recovered = _load_snapshot(self.filepath, self.backups, self.read_only)
+        if data is None:
+            return {"schema_version": SCHEMA_VERSION, "activity": {}, "daily": {}, "partitions": {},
+                    "handle_times": {}, "hours": {}}
+        return data
+
+    def _migrate(self, version):
+        """Upgrade a snapshot from an older schema version one step at a time."""
+        print(f"Migrating stats file {self.filepath} from schema version {version} to {SCHEMA_VERSION}")
+        if version < 1:
+            self._migrate_v1()
+        if version < 2:
+            self._migrate_v2()
+        if version < 3:
+            # No handle times were recorded before v3, the sketches start empty
+            self.data["handle_times"] = {}
+        if version < 4:
+            self._migrate_v4()
+        self.data["schema_version"] = SCHEMA_VERSION
+
+    def _migrate_v1(self):
+        """v0 -> v1: ticket dicts instead of bare timestamp strings, per-day rollups."""
+        data = self.data
+        data["tickets"] = [{"timestamp": t, "has_reply": True} if isinstance(t, str) else t
+                           for t in data.get("tickets", [])]
+        if "activity" not in data: data["activity"] = {}
+        data["daily"] = {}
+        for t in data["tickets"]:
+            self._count_ticket(t["timestamp"], t.get("has_reply", True))
+
+    def _migrate_v2(self):
+        """v1 -> v2: move the inline tickets into month partitions."""
+        tickets = self.data.pop("tickets", [])
+        self.data["partitions"] = {}
+        seq = self.data.get("journal_seq", 0)
+        for t in tickets:
+            month = t["timestamp"][:7]
+            partition = self._partitions.get(month)
+            if partition is None:
+                partition = self._partitions[month] = TicketPartition(month, journal_seq=seq)
+            partition.add(t["timestamp"], t.get("has_reply", True), handle_time=t.get("handle_time"))
+        for month, partition in self._partitions.items():
+            self.data["partitions"][month] = len(partition)
+
+    def _migrate_v4(self):
+        """v3 -> v4: hour buckets, backfilled with the tickets (past activity has no hour)."""
+        self.data["hours"] = {}
+        for t in self.iter_tickets():
+            self._count_hour(t["timestamp"][:10], int(t["timestamp"][11:13]), t.get("has_reply", True))
+        self._evict()
+
+    def _recover_partitions(self):
+        """
+        After falling back to a backup snapshot, bring back what the partition
+        files saved since that backup already hold. Every valid partition file
+        is listed again (an unlisted one would be overwritten by the next new
+        ticket of its month), and the day rollups, hour buckets and handle-time
+        sketches of a month whose partition is newer than the snapshot are
+        rebuilt from its tickets. Returns {month: journal_seq} of the rebuilt
+        months; their journal records up to that seq are already counted.
+        """
+        snapshot_seq = self.data.get("journal_seq", 0)
+        rebuilt = {}
+        if not os.path.isdir(self.partition_dir):
+            return rebuilt
+        for name in sorted(os.listdir(self.partition_dir)):
+            month = name[:-len(".json")]
+            if not name.endswith(".json") or month in self._partitions:
+                continue
+            data, _ = _load_snapshot(self._partition_path(month), 1, self.read_only)
+            if data is None:
+                continue
+            partition = TicketPartition(month, data.get("tickets", []), data.get("journal_seq", 0),
+                                        data.get("hourly", []))
+            self._partitions[month] = partition
+            self.data["partitions"][month] = len(partition)
+            if partition.journal_seq > snapshot_seq:
+                self._rebuild_month(partition)
+                rebuilt[month] = partition.journal_seq
+        self._evict()
+        return rebuilt
+
+    def _rebuild_month(self, partition: TicketPartition):
+        """Recount a month's day rollups, hour buckets and sketches from its partition."""
+        month = partition.month
+        for date_str in [d for d in self.data["daily"] if d.startswith(month)]:
+            del self.data["daily"][date_str]
+        for date_str, day in self.data["hours"].items():
+            if date_str.startswith(month):
+                # Keep the activity fields, the ticket counts are recounted below
+                self.data["hours"][date_str] = {h: [0, 0] + row[2:] for h, row in day.items()}
+        sketches = {}
+        for t in list(partition.hourly.rows()) + list(TicketRows([partition.index])):
+            timestamp = t["timestamp"]
+            self._count_ticket(timestamp, t["has_reply"])
+            self._count_hour(timestamp[:10], int(timestamp[11:13]), t["has_reply"])
+            if "handle_time" in t:
+                sketches.setdefault(timestamp[:10], HandleTimeSketch()).add(t["handle_time"])
+        # Days whose tickets were all folded keep their sketch (folding drops handle times)
+        self.sketches.update(sketches)
+
+    def _pinned_months(self):
+        """Months the dashboard reads constantly (current week and month)."""
+        now = datetime.now()
+        return {_month_key(now - timedelta(days=now.weekday())), _month_key(now)}
+
+    def _partition(self, month, create=False) -> Optional[TicketPartition]:
+        """Return a month partition, loading it from disk if needed."""
+        with self._lock:
+            partition = self._partitions.get(month)
+            if partition is not None:
+                self._partitions.move_to_end(month)
+                return partition
+            if month in self.data["partitions"]:
+                partition = self._load_partition(month)
+            elif create and os.path.exists(self._partition_path(month)):
+                # On disk but not listed by the snapshot: load it, never overwrite it
+                partition = self._load_partition(month)
+                self.data["partitions"] = self._publish(self.data["partitions"], month, len(partition))
+            elif create:
+                partition = TicketPartition(month)
+                # Never saved: dirty, so _evict keeps it until it is written
+                partition.saved_version = -1
+                self.data["partitions"] = self._publish(self.data["partitions"], month, 0)
+            else:
+                return None
+            self._partitions[month] = partition
+            self._evict()
+            return partition
+
+    def _load_partition(self, month) -> TicketPartition:
+        data, _ = _load_snapshot(self._partition_path(month), 1, self.read_only)
+        if data is None:
+            print(f"Stats partition {month} is missing, its tickets are lost")
+            return TicketPartition(month)
+        return TicketPartition(month, data.get("tickets", []), data.get("journal_seq", 0), data.get("hourly", []))
+
+    def _evict(self):
+        """Drop least recently used partitions beyond max_partitions."""
+        with self._lock:
+            excess = len(self._partitions) - self.max_partitions
+            if excess <= 0:
+                return
+            pinned = self._pinned_months()
+            for month in list(self._partitions):
+                if excess <= 0:
+                    break
+                # Unsaved and current partitions always stay resident
+                if month in pinned or self._partitions[month].dirty:
+                    continue
+                del self._partitions[month]
+                excess -= 1
+
+    def _months(self, start: datetime, end: Optional[datetime]):
+        """Existing partition months overlapping [start, end], oldest first."""
+        months = sorted(self.data["partitions"])
+        first = _month_key(start)
+        last = _month_key(end) if end is not None else None
+        return [m for m in months if m >= first and (last is None or m <= last)]
+
+    def _partitions_for(self, start: datetime, end: Optional[datetime]):
+        for month in self._months(start, end):
+            partition = self._partition(month)
+            if partition is not None:
+                yield partition
+
+    def iter_tickets(self):
+        """Yield every stored ticket dict, one partition at a time."""
+        for month in sorted(self.data["partitions"]):
+            partition = self._partition(month)
+            if partition is not None:
+                yield from partition.hourly.rows()
+                yield from TicketRows([partition.index])
+
+    @property
+    def tickets(self) -> TicketRows:
+        """
+        Read-only legacy view of every raw ticket as {"timestamp", "has_reply"}
+        dicts (tickets folded by retention are not included). Loads all
+        partitions, so only meant for one-off exports.
+        """
+        with self._lock:
+            months = sorted(self.data["partitions"])
+            return TicketRows(self._partition(m).index for m in months)
+
+    def legacy_data(self):
+        return LegacyData(self.data, lambda: self.tickets)
+
+    def _calculate_daily_metrics(self):
+        """Calculate and update derived metrics (CPH, AHT) for today."""
+        today = datetime.now().strftime("%Y-%m-%d")
+        if today not in self.data["activity"]:
+            return
+
+        stats = dict(self.data["activity"][today])
+        duration_seconds = stats.get("duration", 0)
+        duration_hours = duration_seconds / 3600.0
+
+        # Count tickets for today
+        counts = self.data["daily"].get(today, {})
+        ticket_count = counts.get("replies", 0) + counts.get("no_replies", 0)
+
+        # Update stats
+        stats["ticket_count"] = ticket_count
+
+        if duration_hours > 0:
+            stats["cph"] = round(ticket_count / duration_hours, 2)
+        else:
+            stats["cph"] = 0.0
+
+        if ticket_count > 0:
+            stats["aht"] = round(duration_seconds / ticket_count, 2)
+        else:
+            stats["aht"] = 0.0
+        self.data["activity"] = self._publish(self.data["activity"], today, stats)
+
+    def _save_data(self):
+        """Write dirty partitions and the main snapshot, then truncate the journal (compaction)."""
+        if self.read_only:
+            return
+        with self._lock:
+            # Ensure metrics are up-to-date before saving
+            self._calculate_daily_metrics()
+            dirty = [(p, p.version, p.to_json()) for p in self._partitions.values() if p.dirty]
+            handle_times = {d: sketch.to_dict() for d, sketch in self.sketches.items()}
+            snapshot = json.dumps(dict(self.data, handle_times=handle_times), indent=2)
+
+        # Partitions first: a partition is never older than the snapshot
+        # listing it, and its journal_seq keeps replay from doubling tickets
+        if dirty:
+            os.makedirs(self.partition_dir, exist_ok=True)
+        for partition, version, text in dirty:
+            _write_snapshot(self._partition_path(partition.month), text, 1)
+            partition.saved_version = version
+        _write_snapshot(self.filepath, snapshot, self.backups)
+
+        # Snapshot now contains every applied record. Records still waiting
+        # in _pending are skipped on replay thanks to their sequence numbers.
+        with open(self.journal_path, 'w'):
+            pass
+        self._journal_records = 0
+        self._evict()
+
+    def _publish(self, table, key, value):
+        """
+        Return table with table[key] = value, without disturbing concurrent
+        readers. Values are never mutated after publication; a new key gives
+        a copied map so a reader iterating the old one is unaffected.
+        """
+        if key in table or not self._shared:
+            table[key] = value
+            return table
+        return {**table, key: value}
+
+    def _count_ticket(self, timestamp: str, has_reply: bool):
+        """Add a ticket to its day rollup."""
+        date_str = timestamp.split('T')[0]
+        day = dict(self.data["daily"].get(date_str) or {"replies": 0, "no_replies": 0})
+        day["replies" if has_reply else "no_replies"] += 1
+        self.data["daily"] = self._publish(self.data["daily"], date_str, day)
+
+    def _count_hour(self, date_str: str, hour: int, has_reply=None, keys=0, clicks=0, duration=0):
+        """Add a ticket (has_reply not None) and/or an activity delta to an hour bucket."""
+        day = dict(self.data["hours"].get(date_str) or {})
+        row = list(day.get(str(hour)) or [0] * len(HOUR_FIELDS))
+        if has_reply is not None:
+            row[0 if has_reply else 1] += 1
+        row[2] += keys
+        row[3] += clicks
+        row[4] += duration
+        day[str(hour)] = row
+        self.data["hours"] = self._publish(self.data["hours"], date_str, day)
+
+    def _apply_record(self, record: Dict):
+        """
+        Apply a single journal record to the in-memory data. On replay a
+        record already contained in the snapshot or in its partition (crash
+        between writing them and truncating the journal) is skipped there.
+        """
+        seq = record.get("seq", 0)
+        in_snapshot = seq and seq <= self.data.get("journal_seq", 0)
+        self.data["journal_seq"] = max(self.data.get("journal_seq", 0), seq)
+        kind = record.get("type")
+        if kind == "ticket":
+            has_reply = record.get("has_reply", True)
+            timestamp = record["timestamp"]
+            handle_time = record.get("handle_time")
+            # A month rebuilt from its partition already counts records up to its seq
+            counted = in_snapshot or (seq and seq <= self._rebuilt.get(timestamp[:7], 0))
+            if not counted:
+                self._count_ticket(timestamp, has_reply)
+                self._count_hour(timestamp[:10], int(timestamp[11:13]), has_reply)
+                if handle_time is not None:
+                    date_str = timestamp.split('T')[0]
+                    sketch = self.sketches.get(date_str)
+                    sketch = sketch.copy() if sketch is not None else HandleTimeSketch()
+                    sketch.add(handle_time)
+                    self.sketches = self._publish(self.sketches, date_str, sketch)
+            partition = self._partition(timestamp[:7], create=True)
+            if not seq or seq > partition.journal_seq:
+                partition.add(timestamp, has_reply, seq, handle_time)
+                self.data["partitions"] = self._publish(self.data["partitions"], partition.month, len(partition))
+        elif kind == "activity" and not in_snapshot:
+            date_str = record["date"]
+            day = dict(self.data["activity"].get(date_str) or _empty_activity())
+            day["keys"] = day.get("keys", 0) + record.get("keys", 0)
+            day["clicks"] = day.get("clicks", 0) + record.get("clicks", 0)
+            day["duration"] = day.get("duration", 0) + record.get("duration", 0)
+            self.data["activity"] = self._publish(self.data["activity"], date_str, day)
+            if self.totals is not None:
+                self.totals.add(date.fromisoformat(date_str), record.get("keys", 0), record.get("clicks", 0),
+                                record.get("duration", 0))
+            if record.get("hour") is not None:
+                self._count_hour(date_str, record["hour"], keys=record.get("keys", 0),
+                                 clicks=record.get("clicks", 0), duration=record.get("duration", 0))
+
+    def _replay_journal(self):
+        """Replay journal records written since the last snapshot."""
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                        crc = record.pop("crc", None)
+                        if crc is not None and zlib.crc32(json.dumps(record).encode("utf-8")) != crc:
+                            raise ValueError("crc mismatch")
+                    except ValueError:
+                        # Torn write from a crash, only the tail can be affected
+                        print(f"Skipping corrupt journal record: {line[:80]}")
+                        continue
+                    self._apply_record(record)
+                    self._journal_records += 1
+        except Exception as e:
+            print(f"Error replaying stats journal: {e}")
+
+        if self._journal_records >= self.compact_threshold:
+            self._save_data()
+
+    def _append_record(self, record: Dict):
+        """Apply a record in memory and queue it for the journal."""
+        with self._lock:
+            record["seq"] = self.data.get("journal_seq", 0) + 1
+            self._apply_record(record)
+            payload = json.dumps(record)
+            crc = zlib.crc32(payload.encode("utf-8"))
+            self._pending.append(f'{payload[:-1]}, "crc": {crc}}}\n')
+
+    def flush(self):
+        """Append queued records to the journal, fsync, and compact if due."""
+        with self._io_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+            if not lines:
+                return
+            try:
+                with open(self.journal_path, 'a') as f:
+                    f.write("".join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception:
+                # Keep ordering: put the records back in front for the retry
+                with self._lock:
+                    self._pending[:0] = lines
+                raise
+            self._journal_records += len(lines)
+
+            if self._journal_records >= self.compact_threshold:
+                self._save_data()
+
+    def compact(self):
+        """Write a full snapshot now (also folds the journal into it)."""
+        with self._io_lock:
+            self._save_data()
+
+    def close(self):
+        """Flush and fold the journal into the snapshot (called on app shutdown)."""
+        self.flush()
+        with self._io_lock:
+            if self._journal_records > 0:
+                self._save_data()
+
+    def add_ticket(self, timestamp, has_reply, handle_time=None):
+        record = {"type": "ticket", "timestamp": timestamp.isoformat(), "has_reply": has_reply}
+        if handle_time is not None:
+            record["handle_time"] = round(handle_time, 3)
+        self._append_record(record)
+
+    def add_activity(self, date_str, keys, clicks, duration, hour=None):
+        record = {"type": "activity", "date": date_str, "keys": keys, "clicks": clicks, "duration": duration}
+        if hour is not None:
+            record["hour"] = hour
+        self._append_record(record)
+
+    def get_tickets(self, start, end=None, replies_only=False):
+        tickets = []
+        with self._lock:
+            for partition in self._partitions_for(start, end):
+                tickets.extend(partition.tickets(start, end, replies_only))
+        return tickets
+
+    def count_tickets(self, start, end=None, replies_only=True):
+        with self._lock:
+            return sum(p.count(start, end, replies_only) for p in self._partitions_for(start, end))
+
+    def first_ticket(self, start, end):
+        with self._lock:
+            for partition in self._partitions_for(start, end):
+                first = partition.first(start, end)
+                if first is not None:
+                    return first
+        return None
+
+    def last_ticket(self, start, end):
+        with self._lock:
+            for partition in reversed(list(self._partitions_for(start, end))):
+                last = partition.last(start, end)
+                if last is not None:
+                    return last
+        return None
+
+    def fold_steps(self, cutoff):
+        """
+        Fold raw tickets older than cutoff into hourly counts, one month per
+        step, and save each folded month right away. Months already folded
+        by an earlier run are skipped.
+        """
+        done = self.data.get("folded_before")
+        first = datetime.fromisoformat(done) if done else datetime.min
+        for month in self._months(first, cutoff):
+            with self._lock:
+                folded = self._partition(month).fold(cutoff.timestamp())
+            if folded:
+                self.compact()
+            yield folded
+        with self._lock:
+            if cutoff.isoformat() > (done or ""):
+                self.data["folded_before"] = cutoff.isoformat()
+
+    def handle_time_sketch(self, start_str, end_str):
+        return HandleTimeSketch.merged(sketch for d, sketch in self.sketches.items() if start_str <= d <= end_str)
+
+    def daily_counts(self):
+        return {d: c["replies"] for d, c in self.data["daily"].items() if c["replies"]}
+
+    def get_activity(self, date_str):
+        # Copy so callers can't modify the published bucket
+        return dict(self.data["activity"].get(date_str) or _empty_activity())
+
+    def get_activity_range(self, start_str, end_str=None):
+        return {d: a for d, a in self.data["activity"].items()
+                if d >= start_str and (end_str is None or d <= end_str)}
+
+    def activity_totals(self, start_str, end_str=None):
+        with self._lock:
+            return self.totals.total(date.fromisoformat(start_str), end_str and date.fromisoformat(end_str))
+
+    def get_day_rollups(self, start_str, end_str):
+        daily = self.data["daily"]
+        activity = self.data["activity"]
+        rollups = {}
+        for date_str in _date_range(start_str, end_str):
+            counts = daily.get(date_str)
+            act = activity.get(date_str)
+            if counts is None and act is None:
+                continue
+            counts = counts or {}
+            rollups[date_str] = _rollup(counts.get("replies", 0), counts.get("no_replies", 0), act)
+        return rollups
+
+    def get_hour_rollups(self, start_str, end_str):
+        hours = self.data["hours"]
+        rollups = {}
+        for date_str in _date_range(start_str, end_str):
+            day = hours.get(date_str)
+            if day is None:
+                continue
+            for hour in sorted(day, key=int):
+                rollups[(date_str, int(hour))] = dict(zip(HOUR_FIELDS, day[hour]))
+        return rollups
+
+
+class SqliteStatsStore(StatsStore):
+    """
+    SQLite backend (ticket_stats.db).
+
+    Tickets are stored with an indexed epoch timestamp so range queries run in
+    SQL. Each mutation commits inline: with WAL and synchronous=NORMAL a commit
+    only appends to the WAL without an fsync, so flush() has nothing to do.
+    The daily table is a per-day rollup of ticket counts maintained in the
+    same transaction as each insert. WAL mode plus one connection per thread
+    lets the GUI thread read while the InputMonitor save thread writes.
+
+    The schema version is kept in PRAGMA user_version; databases from older
+    versions are upgraded once on open.
+    """
+    def __init__(self, db_path="ticket_stats.db", import_json=None):
+        self.db_path = db_path
+        self._local = threading.local()
+
+        conn = self._conn()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SQLITE_SCHEMA_VERSION:
+            # Version 0: a new database (or one whose first setup failed) imports the JSON history
+            self._migrate(version, import_json if version == 0 else None)
+
+    def _migrate(self, version, import_json=None):
+        """
+        Create or upgrade the schema:
+          1: tickets and activity tables
+          2: daily rollup table, backfilled from existing tickets
+          3: per-ticket handle_time column and per-day handle-time sketches
+          4: hourly table for tickets folded by the retention job
+          5: hours table of per-day hour-of-day buckets, backfilled from tickets
+
+        Runs in a single transaction together with the one-time JSON import
+        and the user_version stamp: if anything fails nothing is committed,
+        and the next start retries the whole upgrade (including the import).
+        """
+        conn = self._conn()
+        imported = None
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute("CREATE TABLE IF NOT EXISTS tickets (ts REAL NOT NULL, has_reply INTEGER NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_ts ON tickets (ts)")
+            conn.execute("CREATE TABLE IF NOT EXISTS activity ("
+                         "day TEXT PRIMARY KEY, keys INTEGER NOT NULL, clicks INTEGER NOT NULL, duration REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS daily ("
+                         "day TEXT PRIMARY KEY, replies INTEGER NOT NULL, no_replies INTEGER NOT NULL)")
+
+            # Databases created before the rollup table get it backfilled once
+            if version < 2 and conn.execute("SELECT NOT EXISTS (SELECT 1 FROM daily)").fetchone()[0]:
+                conn.execute("INSERT INTO daily (day, replies, no_replies) "
+                             "SELECT date(ts, 'unixepoch', 'localtime') AS day, SUM(has_reply), SUM(1 - has_reply) "
+                             "FROM tickets GROUP BY day")
+            if version < 3:
+                conn.execute("ALTER TABLE tickets ADD COLUMN handle_time REAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS handle_sketch (day TEXT PRIMARY KEY, sketch TEXT NOT NULL)")
+            if version < 4:
+                conn.execute("CREATE TABLE IF NOT EXISTS hourly ("
+                             "hour REAL PRIMARY KEY, replies INTEGER NOT NULL, no_replies INTEGER NOT NULL)")
+            if version < 5:
+                conn.execute("CREATE TABLE IF NOT EXISTS hours ("
+                             "day TEXT NOT NULL, hour INTEGER NOT NULL, replies INTEGER NOT NULL DEFAULT 0, "
+                             "no_replies INTEGER NOT NULL DEFAULT 0, keys INTEGER NOT NULL DEFAULT 0, "
+                             "clicks INTEGER NOT NULL DEFAULT 0, duration REAL NOT NULL DEFAULT 0, "
+                             "PRIMARY KEY (day, hour)) WITHOUT ROWID")
+                conn.execute("INSERT INTO hours (day, hour, replies, no_replies) "
+                             "SELECT date(t, 'unixepoch', 'localtime') AS day, "
+                             "CAST(strftime('%H', t, 'unixepoch', 'localtime') AS INTEGER) AS h, SUM(r), SUM(n) "
+                             "FROM (SELECT ts AS t, has_reply AS r, 1 - has_reply AS n FROM tickets "
+                             "UNION ALL SELECT hour, replies, no_replies FROM hourly) GROUP BY day, h")
+
+            # One-time import of an existing JSON history
+            if import_json and os.path.exists(import_json):
+                imported = self._import_json(conn, import_json)
+            conn.execute(f"PRAGMA user_version = {SQLITE_SCHEMA_VERSION}")
+        if imported is not None:
+            print(f"Imported {imported} tickets from {import_json}")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _import_json(self, conn, json_path) -> int:
+        """Insert the history of a JSON store into the open migration transaction; returns the ticket count."""
+        # Read-only: the JSON files are left exactly as they are
+        source = JsonStatsStore(json_path, read_only=True)
+        conn.executemany("INSERT INTO tickets (ts, has_reply, handle_time) VALUES (?, ?, ?)",
+                         ((datetime.fromisoformat(t["timestamp"]).timestamp(), int(t.get("has_reply", True)),
+                           t.get("handle_time")) for t in source.iter_tickets()))
+        conn.executemany("INSERT INTO daily (day, replies, no_replies) VALUES (?, ?, ?)",
+                         ((d, c["replies"], c["no_replies"]) for d, c in source.data["daily"].items()))
+        conn.executemany("INSERT INTO handle_sketch (day, sketch) VALUES (?, ?)",
+                         ((d, json.dumps(s.to_dict())) for d, s in source.sketches.items()))
+        conn.executemany("INSERT INTO activity (day, keys, clicks, duration) VALUES (?, ?, ?, ?)",
+                         ((d, a.get("keys", 0), a.get("clicks", 0), a.get("duration", 0))
+                          for d, a in source.data["activity"].items()))
+        conn.executemany("INSERT INTO hours (day, hour, replies, no_replies, keys, clicks, duration) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         ((d, int(h), *row) for d, day in source.data["hours"].items() for h, row in day.items()))
+        return sum(source.data["partitions"].values())
+
+    def add_ticket(self, timestamp, has_reply, handle_time=None):
+        day = timestamp.strftime("%Y-%m-%d")
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT INTO tickets (ts, has_reply, handle_time) VALUES (?, ?, ?)",
+                         (timestamp.timestamp(), int(has_reply), handle_time))
+            conn.execute("INSERT INTO daily (day, replies, no_replies) VALUES (?, ?, ?) "
+                         "ON CONFLICT(day) DO UPDATE SET replies = replies + excluded.replies, "
+                         "no_replies = no_replies + excluded.no_replies",
+                         (day, int(has_reply), int(not has_reply)))
+            conn.execute("INSERT INTO hours (day, hour, replies, no_replies) VALUES (?, ?, ?, ?) "
+                         "ON CONFLICT(day, hour) DO UPDATE SET replies = replies + excluded.replies, "
+                         "no_replies = no_replies + excluded.no_replies",
+                         (day, timestamp.hour, int(has_reply), int(not has_reply)))
+            if handle_time is not None:
+                row = conn.execute("SELECT sketch FROM handle_sketch WHERE day = ?", (day,)).fetchone()
+                sketch = HandleTimeSketch.from_dict(json.loads(row[0])) if row else HandleTimeSketch()
+                sketch.add(handle_time)
+                conn.execute("INSERT OR REPLACE INTO handle_sketch (day, sketch) VALUES (?, ?)",
+                             (day, json.dumps(sketch.to_dict())))
+
+    def add_activity(self, date_str, keys, clicks, duration, hour=None):
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT INTO activity (day, keys, clicks, duration) VALUES (?, ?, ?, ?) "
+                         "ON CONFLICT(day) DO UPDATE SET keys = keys + excluded.keys, "
+                         "clicks = clicks + excluded.clicks, duration = duration + excluded.duration",
+                         (date_str, keys, clicks, duration))
+            if hour is not None:
+                conn.execute("INSERT INTO hours (day, hour, keys, clicks, duration) VALUES (?, ?, ?, ?, ?) "
+                             "ON CONFLICT(day, hour) DO UPDATE SET keys = keys + excluded.keys, "
+                             "clicks = clicks + excluded.clicks, duration = duration + excluded.duration",
+                             (date_str, hour, keys, clicks, duration))
+
+    def _range_clause(self, start, end, replies_only, column="ts"):
+        sql = f"{column} >= ?"
+        params = [start.timestamp()]
+        if end is not None:
+            sql += f" AND {column} <= ?"
+            params.append(end.timestamp())
+        if replies_only and column == "ts":
+            sql += " AND has_reply = 1"
+        return sql, params
+
+    # Tickets folded by retention live in the hourly table and are reported
+    # at the start of their hour. Each query is a single statement so it
+    # reads one consistent WAL snapshot even while the retention job moves
+    # rows from tickets to hourly.
+
+    def _union(self, start, end, replies_only):
+        """(sql, params) selecting (t, n) rows: raw tickets plus folded hour buckets."""
+        where, params = self._range_clause(start, end, replies_only)
+        hour_where, hour_params = self._range_clause(start, end, False, "hour")
+        count = "replies" if replies_only else "replies + no_replies"
+        sql = (f"SELECT ts AS t, 1 AS n FROM tickets WHERE {where} "
+               f"UNION ALL SELECT hour, {count} FROM hourly WHERE {hour_where} AND {count} > 0")
+        return sql, params + hour_params
+
+    def get_tickets(self, start, end=None, replies_only=False):
+        sql, params = self._union(start, end, replies_only)
+        tickets = []
+        for t, n in self._conn().execute(f"{sql} ORDER BY t", params):
+            tickets.extend([datetime.fromtimestamp(t)] * n)
+        return tickets
+
+    def count_tickets(self, start, end=None, replies_only=True):
+        sql, params = self._union(start, end, replies_only)
+        return self._conn().execute(f"SELECT COALESCE(SUM(n), 0) FROM ({sql})", params).fetchone()[0]
+
+    def first_ticket(self, start, end):
+        sql, params = self._union(start, end, False)
+        t = self._conn().execute(f"SELECT MIN(t) FROM ({sql})", params).fetchone()[0]
+        return datetime.fromtimestamp(t) if t is not None else None
+
+    def last_ticket(self, start, end):
+        sql, params = self._union(start, end, False)
+        t = self._conn().execute(f"SELECT MAX(t) FROM ({sql})", params).fetchone()[0]
+        return datetime.fromtimestamp(t) if t is not None else None
+
+    def fold_steps(self, cutoff):
+        conn = self._conn()
+        while True:
+            rows = conn.execute("SELECT rowid, ts, has_reply FROM tickets WHERE ts < ? ORDER BY ts LIMIT ?",
+                                (cutoff.timestamp(), FOLD_BATCH)).fetchall()
+            if not rows:
+                return
+            counts = {}
+            for _, ts, has_reply in rows:
+                hour = datetime.fromtimestamp(ts).replace(minute=0, second=0, microsecond=0).timestamp()
+                bucket = counts.setdefault(hour, [0, 0])
+                bucket[0 if has_reply else 1] += 1
+            with conn:
+                conn.executemany("INSERT INTO hourly (hour, replies, no_replies) VALUES (?, ?, ?) "
+                                 "ON CONFLICT(hour) DO UPDATE SET replies = replies + excluded.replies, "
+                                 "no_replies = no_replies + excluded.no_replies",
+                                 ((hour, r, n) for hour, (r, n) in counts.items()))
+                conn.executemany("DELETE FROM tickets WHERE rowid = ?", ((rowid,) for rowid, _, _ in rows))
+            yield len(rows)
+
+    def handle_time_sketch(self, start_str, end_str):
+        rows = self._conn().execute("SELECT sketch FROM handle_sketch WHERE day BETWEEN ? AND ?", (start_str, end_str))
+        return HandleTimeSketch.merged(HandleTimeSketch.from_dict(json.loads(sketch)) for (sketch,) in rows)
+
+    def daily_counts(self):
+        return dict(self._conn().execute("SELECT day, replies FROM daily WHERE replies > 0"))
+
+    @property
+    def tickets(self) -> List[Dict]:
+        """Every raw ticket as a legacy {"timestamp", "has_reply"} dict (folded tickets are not included)."""
+        rows = []
+        for ts, has_reply, handle_time in self._conn().execute(
+                "SELECT ts, has_reply, handle_time FROM tickets ORDER BY ts"):
+            row = {"timestamp": datetime.fromtimestamp(ts).isoformat(), "has_reply": bool(has_reply)}
+            if handle_time is not None:
+                row["handle_time"] = handle_time
+            rows.append(row)
+        return rows
+
+    def legacy_data(self):
+        daily = {d: {"replies": r, "no_replies": n}
+                 for d, r, n in self._conn().execute("SELECT day, replies, no_replies FROM daily")}
+        return LegacyData({"activity": self.get_activity_range("0000-01-01"), "daily": daily}, lambda: self.tickets)
+
+    def get_activity(self, date_str):
+        row = self._conn().execute("SELECT keys, clicks, duration FROM activity WHERE day = ?", (date_str,)).fetchone()
+        if row is None:
+            return _empty_activity()
+        return {"keys": row[0], "clicks": row[1], "duration": row[2]}
+
+    def get_activity_range(self, start_str, end_str=None):
+        sql = "SELECT day, keys, clicks, duration FROM activity WHERE day >= ?"
+        params = [start_str]
+        if end_str is not None:
+            sql += " AND day <= ?"
+            params.append(end_str)
+        return {d: {"keys": k, "clicks": c, "duration": dur}
+                for d, k, c, dur in self._conn().execute(sql, params)}
+
+    def activity_totals(self, start_str, end_str=None):
+        # Range scan on the activity primary key, one row per day
+        sql = ("SELECT COALESCE(SUM(keys), 0), COALESCE(SUM(clicks), 0), COALESCE(SUM(duration), 0) "
+               "FROM activity WHERE day >= ?")
+        params = [start_str]
+        if end_str is not None:
+            sql += " AND day <= ?"
+            params.append(end_str)
+        keys, clicks, duration = self._conn().execute(sql, params).fetchone()
+        return {"keys": keys, "clicks": clicks, "duration": duration}
+
+    def get_day_rollups(self, start_str, end_str):
+        conn = self._conn()
+        rollups = {}
+        for d, replies, no_replies in conn.execute(
+                "SELECT day, replies, no_replies FROM daily WHERE day BETWEEN ? AND ?", (start_str, end_str)):
+            rollups[d] = _rollup(replies, no_replies)
+        for d, keys, clicks, duration in conn.execute(
+                "SELECT day, keys, clicks, duration FROM activity WHERE day BETWEEN ? AND ?", (start_str, end_str)):
+            row = rollups.setdefault(d, _rollup())
+            row.update(keys=keys, clicks=clicks, duration=duration)
+        return dict(sorted(rollups.items()))
+
+    def get_hour_rollups(self, start_str, end_str):
+        rows = self._conn().execute(
+            "SELECT day, hour, replies, no_replies, keys, clicks, duration FROM hours "
+            "WHERE day BETWEEN ? AND ? ORDER BY day, hour", (start_str, end_str))
+        return {(day, hour): dict(zip(HOUR_FIELDS, row)) for day, hour, *row in rows}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_store(filepath="ticket_stats.json", backend="json") -> StatsStore:
+    """Create the storage backend selected in config ("json" or "sqlite")."""
+    if backend == "sqlite":
+        db_path = os.path.splitext(filepath)[0] + ".db"
+        return SqliteStatsStore(db_path, import_json=filepath)
+    return JsonStatsStore(filepath)
@@ -0,0 +1,127 @@
+import threading
+import time
+
+
+class StatsWriter(threading.Thread):
+    """
+    Dedicated thread that owns stats persistence (write-behind).
+
+    StatsManager applies mutations in memory and calls notify(); the writer
+    waits up to `latency` seconds after the first unflushed mutation so a
+    burst (hotkey presses, the minute activity save) is written in a single
+    store.flush(). Records are flushed in the order they were applied, and
+    flush()/stop() block until everything applied so far is on disk.
+    """
+    def __init__(self, store, latency=0.5):
+        super().__init__(daemon=True, name="StatsWriter")
+        self.store = store
+        self.latency = latency
+
+        self._cond = threading.Condition()
+        self._requested = 0      # mutations applied so far
+        self._flushed = 0        # mutations persisted so far
+        self._dirty_since = None # monotonic time of the oldest unflushed mutation
+        self._urgent = False
+        self._stopping = False
+
+        # Counters for tuning the latency window
+        self.flush_count = 0
+        self.error_count = 0
+        self.total_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.last_flush_latency = 0.0
+        self.total_write_time = 0.0
+
+    def notify(self):
+        """Record that a mutation was applied and needs persisting."""
+        with self._cond:
+            self._requested += 1
+            if self._dirty_since is None:
+                self._dirty_since = time.monotonic()
+            self._cond.notify_all()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._flushed == self._requested and not self._stopping:
+                    self._cond.wait()
+                if self._flushed == self._requested:
+                    break # Stopping with nothing left to write
+
+                # Coalesce: let the burst settle until the latency window expires
+                deadline = self._dirty_since + self.latency
+                while not (self._urgent or self._stopping):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                target = self._requested
+                dirty_since = self._dirty_since
+                self._dirty_since = None
+                self._urgent = False
+
+            write_start = time.monotonic()
+            try:
+                self.store.flush()
+            except Exception as e:
+                print(f"Error writing stats: {e}")
+                with self._cond:
+                    self.error_count += 1
+                    if self._dirty_since is None:
+                        self._dirty_since = dirty_since
+                    stopping = self._stopping
+                if stopping:
+                    break # Don't spin on a broken disk during shutdown
+                time.sleep(1) # Retry; the store kept the records queued
+                continue
+
+            now = time.monotonic()
+            with self._cond:
+                self._flushed = target
+                latency = now - dirty_since
+                self.flush_count += 1
+                self.total_flush_latency += latency
+                self.max_flush_latency = max(self.max_flush_latency, latency)
+                self.last_flush_latency = latency
+                self.total_write_time += now - write_start
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Persist everything applied so far, blocking until it is written."""
+        with self._cond:
+            target = self._requested
+            if self._flushed >= target:
+                return True
+            if not self.is_alive():
+                # Writer not running (not started or already stopped)
+                self.store.flush()
+                self._flushed = target
+                return True
+            self._urgent = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._flushed >= target, timeout)
+
+    def stop(self, timeout=5):
+        """Flush remaining mutations and stop the thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self.is_alive():
+            self.join(timeout)
+
+    def get_stats(self):
+        """Flush counters: how many flushes, coalescing and latency (ms)."""
+        with self._cond:
+            flushes = self.flush_count
+            return {
+                "mutations": self._requested,
+                "pending": self._requested - self._flushed,
+                "flushes": flushes,
+                "errors": self.error_count,
+                "mutations_per_flush": round(self._flushed / flushes, 2) if flushes else 0.0,
+                "avg_latency_ms": round(self.total_flush_latency / flushes * 1000, 2) if flushes else 0.0,
+                "max_latency_ms": round(self.max_flush_latency * 1000, 2),
+                "last_latency_ms": round(self.last_flush_latency * 1000, 2),
+                "avg_write_ms": round(self.total_write_time / flushes * 1000, 2) if flushes else 0.0,
+            }
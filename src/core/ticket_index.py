@@ -0,0 +1,215 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional
+
+
+class TicketIndex:
+    """
+    Sorted in-memory index of ticket completion times.
+
+    Keeps epoch seconds in a sorted array('d') with a parallel has_reply
+    bitmap and a running count of replies, so range counts are two bisect
+    lookups instead of a scan that re-parses every ISO timestamp. This is
+    also the only in-memory copy of the tickets: about 17 bytes per ticket
+    instead of a dict with an ISO string. Per-ticket handle times (seconds)
+    get their own column once the first one is recorded, NaN where unknown.
+    """
+    def __init__(self):
+        self.times = array('d')
+        self.replies = bytearray()
+        self.handle_times = None
+        # _reply_prefix[i] = number of replies among the first i tickets
+        self._reply_prefix = array('q', [0])
+
+    def __len__(self):
+        return len(self.times)
+
+    def add(self, ts: float, has_reply: bool, handle_time: Optional[float] = None):
+        """Insert a ticket, appending in O(1) for the usual in-order case."""
+        flag = 1 if has_reply else 0
+        if handle_time is not None and self.handle_times is None:
+            self.handle_times = array('d', [math.nan]) * len(self.times)
+        handle = math.nan if handle_time is None else handle_time
+
+        if not self.times or ts >= self.times[-1]:
+            self.times.append(ts)
+            self.replies.append(flag)
+            if self.handle_times is not None:
+                self.handle_times.append(handle)
+            self._reply_prefix.append(self._reply_prefix[-1] + flag)
+            return
+
+        # Out of order (clock change): insert and rebuild the prefix tail
+        i = bisect_right(self.times, ts)
+        self.times.insert(i, ts)
+        self.replies.insert(i, flag)
+        if self.handle_times is not None:
+            self.handle_times.insert(i, handle)
+        del self._reply_prefix[i + 1:]
+        total = self._reply_prefix[i]
+        for f in self.replies[i:]:
+            total += f
+            self._reply_prefix.append(total)
+
+    def span(self, start: datetime, end: Optional[datetime] = None):
+        """Return (lo, hi) positions of tickets with start <= t <= end."""
+        lo = bisect_left(self.times, start.timestamp())
+        hi = len(self.times) if end is None else bisect_right(self.times, end.timestamp())
+        return lo, max(lo, hi)
+
+    def count(self, start: datetime, end: Optional[datetime] = None, replies_only=True) -> int:
+        lo, hi = self.span(start, end)
+        if replies_only:
+            return self._reply_prefix[hi] - self._reply_prefix[lo]
+        return hi - lo
+
+    def tickets(self, start: datetime, end: Optional[datetime] = None, replies_only=False) -> List[datetime]:
+        lo, hi = self.span(start, end)
+        times, replies = self.times, self.replies
+        return [datetime.fromtimestamp(times[i]) for i in range(lo, hi) if not replies_only or replies[i]]
+
+    def first(self, start: datetime, end: Optional[datetime] = None) -> Optional[datetime]:
+        lo, hi = self.span(start, end)
+        return datetime.fromtimestamp(self.times[lo]) if hi > lo else None
+
+    def last(self, start: datetime, end: Optional[datetime] = None) -> Optional[datetime]:
+        lo, hi = self.span(start, end)
+        return datetime.fromtimestamp(self.times[hi - 1]) if hi > lo else None
+
+    def row(self, i) -> Dict:
+        """Ticket i in the legacy {"timestamp": ISO str, "has_reply": bool} form."""
+        row = {"timestamp": datetime.fromtimestamp(self.times[i]).isoformat(), "has_reply": bool(self.replies[i])}
+        if self.handle_times is not None and not math.isnan(self.handle_times[i]):
+            row["handle_time"] = self.handle_times[i]
+        return row
+
+
+class TicketRows(Sequence):
+    """
+    Read-only list-of-dicts view over one or more TicketIndex columns, for
+    code that still expects data["tickets"]. Rows are built on access.
+    """
+    def __init__(self, indexes):
+        self._indexes = list(indexes)
+        # _offsets[k] = number of rows before self._indexes[k]
+        self._offsets = [0] + list(accumulate(len(index) for index in self._indexes))
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("ticket index out of range")
+        k = bisect_right(self._offsets, i) - 1
+        return self._indexes[k].row(i - self._offsets[k])
+
+    def __iter__(self):
+        for index in self._indexes:
+            for i in range(len(index)):
+                yield index.row(i)
+
+
+class LegacyData(Mapping):
+    """
+    Read-only mapping in the shape of the old single-file stats data
+    (StatsManager.data). data["tickets"] is built by the tickets callable
+    only when that key is read, as listing every ticket can mean loading
+    every month partition; the other keys come from fields.
+    """
+    def __init__(self, fields: Dict, tickets: Callable[[], Sequence]):
+        self._fields = fields
+        self._tickets = tickets
+
+    def __getitem__(self, key):
+        if key == "tickets":
+            return self._tickets()
+        return self._fields[key]
+
+    def __iter__(self):
+        yield from (k for k in self._fields if k != "tickets")
+        yield "tickets"
+
+    def __len__(self):
+        return len([k for k in self._fields if k != "tickets"]) + 1
+
+
+class HourlyIndex:
+    """
+    Ticket counts folded into hour buckets by the retention job. Answers the
+    same range queries as TicketIndex with every ticket of a bucket placed at
+    the start of its hour, so counts over hour-aligned ranges (days, weeks,
+    months) are exact.
+    """
+    def __init__(self):
+        self.hours = array('d') # sorted hour-start epoch seconds
+        self.replies = array('q')
+        self.no_replies = array('q')
+        # _prefix[i] / _reply_prefix[i] = tickets / replies in the first i buckets
+        self._prefix = array('q', [0])
+        self._reply_prefix = array('q', [0])
+
+    def __len__(self):
+        return self._prefix[-1]
+
+    def merge(self, counts: Dict[float, List[int]]):
+        """Add {hour_start_ts: [replies, no_replies]} and rebuild the prefixes."""
+        merged = {h: [r, n] for h, r, n in zip(self.hours, self.replies, self.no_replies)}
+        for hour, (r, n) in counts.items():
+            bucket = merged.setdefault(hour, [0, 0])
+            bucket[0] += r
+            bucket[1] += n
+        self.hours = array('d', sorted(merged))
+        self.replies = array('q', (merged[h][0] for h in self.hours))
+        self.no_replies = array('q', (merged[h][1] for h in self.hours))
+        self._prefix = array('q', [0])
+        self._reply_prefix = array('q', [0])
+        for r, n in zip(self.replies, self.no_replies):
+            self._prefix.append(self._prefix[-1] + r + n)
+            self._reply_prefix.append(self._reply_prefix[-1] + r)
+
+    def span(self, start: datetime, end: Optional[datetime] = None):
+        lo = bisect_left(self.hours, start.timestamp())
+        hi = len(self.hours) if end is None else bisect_right(self.hours, end.timestamp())
+        return lo, max(lo, hi)
+
+    def count(self, start: datetime, end: Optional[datetime] = None, replies_only=True) -> int:
+        lo, hi = self.span(start, end)
+        prefix = self._reply_prefix if replies_only else self._prefix
+        return prefix[hi] - prefix[lo]
+
+    def tickets(self, start: datetime, end: Optional[datetime] = None, replies_only=False) -> List[datetime]:
+        lo, hi = self.span(start, end)
+        result = []
+        for i in range(lo, hi):
+            n = self.replies[i] if replies_only else self.replies[i] + self.no_replies[i]
+            result.extend([datetime.fromtimestamp(self.hours[i])] * n)
+        return result
+
+    def first(self, start: datetime, end: Optional[datetime] = None) -> Optional[datetime]:
+        lo, hi = self.span(start, end)
+        return datetime.fromtimestamp(self.hours[lo]) if hi > lo else None
+
+    def last(self, start: datetime, end: Optional[datetime] = None) -> Optional[datetime]:
+        lo, hi = self.span(start, end)
+        return datetime.fromtimestamp(self.hours[hi - 1]) if hi > lo else None
+
+    def buckets(self) -> List[List]:
+        """Serializable [[hour ISO str, replies, no_replies], ...]."""
+        return [[datetime.fromtimestamp(h).isoformat(), r, n]
+                for h, r, n in zip(self.hours, self.replies, self.no_replies)]
+
+    def rows(self):
+        """Yield one legacy ticket dict per folded ticket (timestamp = hour start)."""
+        for hour, r, n in self.buckets():
+            for _ in range(r):
+                yield {"timestamp": hour, "has_reply": True}
+            for _ in range(n):
+                yield {"timestamp": hour, "has_reply": False}
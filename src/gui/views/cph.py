@@ -39,7 +39,12 @@ class CPHTracker(ctk.CTkFrame):
                 )
                 print(f"Restored input stats: {today_stats}")
         
-        self.current_ticket_start_time = None
+        # Time on the current ticket counts only while the timer runs:
+        # seconds banked before the last pause plus the running stretch
+        self.ticket_active_seconds = 0.0
+        self.running_since = None
+        # Incremental session pace, updated by log_ticket
+        self.pace = self.stats_manager.start_session(self.session_start_time)
         
         self.setup_ui()
         self.update_stats_display()
@@ -107,14 +112,18 @@ class CPHTracker(ctk.CTkFrame):
         # Current CPH Display
         self.cph_label = ctk.CTkLabel(self, text="Current Session CPH: 0.0", font=("Roboto", 14, "bold"), text_color=THEME["accent"])
         self.cph_label.grid(row=4, column=0, columnspan=2, pady=(0, 5))
+
+        # Recent pace and end-of-shift projection
+        self.pace_label = ctk.CTkLabel(self, text="Recent CPH: 0.0", font=("Roboto", 12), text_color=THEME["text_secondary"])
+        self.pace_label.grid(row=5, column=0, columnspan=2, pady=(0, 5))
         
         # KPM/CPM Display
         self.input_stats_label = ctk.CTkLabel(self, text="KPM: 0 | CPM: 0", font=("Roboto", 12), text_color=THEME["text_secondary"])
-        self.input_stats_label.grid(row=5, column=0, columnspan=2, pady=(0, 10))
+        self.input_stats_label.grid(row=6, column=0, columnspan=2, pady=(0, 10))
         
         # Totals Display
         self.input_totals_label = ctk.CTkLabel(self, text="Keys: 0 | Clicks: 0", font=("Roboto", 10), text_color=THEME["text_secondary"])
-        self.input_totals_label.grid(row=6, column=0, columnspan=2, pady=(0, 5))
+        self.input_totals_label.grid(row=7, column=0, columnspan=2, pady=(0, 5))
         
         # Buttons
         self.start_btn = ctk.CTkButton(self, 
@@ -126,7 +135,7 @@ class CPHTracker(ctk.CTkFrame):
                                        font=("Roboto", 14, "bold"),
                                        height=40,
                                        corner_radius=8)
-        self.start_btn.grid(row=7, column=0, columnspan=2, padx=20, pady=(10, 10), sticky="ew")
+        self.start_btn.grid(row=8, column=0, columnspan=2, padx=20, pady=(10, 10), sticky="ew")
         
         self.reply_btn = ctk.CTkButton(self,
                                        text="Complete (Reply)", 
@@ -138,7 +147,7 @@ class CPHTracker(ctk.CTkFrame):
                                        hover_color=THEME["active_row"],
                                        height=32,
                                        corner_radius=8)
-        self.reply_btn.grid(row=8, column=0, padx=(20, 5), pady=(0, 15), sticky="ew")
+        self.reply_btn.grid(row=9, column=0, padx=(20, 5), pady=(0, 15), sticky="ew")
 
         self.noreply_btn = ctk.CTkButton(self, 
                                         text="Complete (No Reply)", 
@@ -150,26 +159,34 @@ class CPHTracker(ctk.CTkFrame):
                                         hover_color=THEME["active_row"],
                                         height=32,
                                         corner_radius=8)
-        self.noreply_btn.grid(row=8, column=1, padx=(5, 20), pady=(0, 15), sticky="ew")
+        self.noreply_btn.grid(row=9, column=1, padx=(5, 20), pady=(0, 15), sticky="ew")
         
         text = f"Hotkey: {self.hotkey} = Reply" if (hasattr(self, 'hotkey') and self.hotkey) else "Hotkey: None"
         self.hotkey_label = ctk.CTkLabel(self, text=text, text_color=THEME["text_secondary"], font=("Roboto", 10))
-        self.hotkey_label.grid(row=9, column=0, columnspan=2, pady=(0, 10))
+        self.hotkey_label.grid(row=10, column=0, columnspan=2, pady=(0, 10))
         
     def format_time(self, seconds):
         mins = seconds // 60
         secs = seconds % 60
         return f"{mins:02d}:{secs:02d}"
         
+    def ticket_elapsed_seconds(self):
+        """Seconds the timer has been running on the current ticket (paused time excluded)."""
+        elapsed = self.ticket_active_seconds
+        if self.running_since is not None:
+            elapsed += (datetime.now() - self.running_since).total_seconds()
+        return elapsed
+
     def start_timer(self):
         if not self.running:
             self.running = True
-            if self.current_ticket_start_time is None:
-                self.current_ticket_start_time = datetime.now()
+            self.running_since = datetime.now()
             self.start_btn.configure(text="Pause", fg_color="orange", hover_color="darkorange")
             self.count_down()
         else:
             self.running = False
+            self.ticket_active_seconds = self.ticket_elapsed_seconds()
+            self.running_since = None
             self.start_btn.configure(text="Resume", fg_color=THEME["btn_primary"], hover_color=THEME["btn_primary_hover"]) # Reset to Primary
             
     def complete_ticket_hotkey(self):
@@ -177,8 +194,13 @@ class CPHTracker(ctk.CTkFrame):
         self.after(0, lambda: self.complete_ticket(True, notify=True))
 
     def complete_ticket(self, has_reply=True, notify=False):
-        # Log ticket
-        self.stats_manager.log_ticket(has_reply)
+        # Log ticket with the time the timer ran on it, pauses excluded (the
+        # manager falls back to the gap since the last completion when the
+        # timer never started)
+        handle_time = None
+        if self.running_since is not None or self.ticket_active_seconds > 0:
+            handle_time = self.ticket_elapsed_seconds()
+        self.stats_manager.log_ticket(has_reply, handle_time=handle_time)
         self.update_stats_display()
         
         # Check if we need to restart the loop
@@ -187,7 +209,8 @@ class CPHTracker(ctk.CTkFrame):
         # Reset timer
         self.running = True # Auto start next ticket
         self.remaining_seconds = self.seconds_per_ticket
-        self.current_ticket_start_time = datetime.now()
+        self.ticket_active_seconds = 0.0
+        self.running_since = datetime.now()
         self.timer_label.configure(text=self.format_time(self.remaining_seconds), text_color=THEME["text_primary"])
         self.elapsed_label.configure(text="Elapsed: 00:00")
         self.start_btn.configure(text="Pause", fg_color="orange", hover_color="darkorange")
@@ -209,8 +232,13 @@ class CPHTracker(ctk.CTkFrame):
              self.count_down()
 
     def update_stats_display(self):
-        cph = self.stats_manager.get_current_session_cph(self.session_start_time)
-        self.cph_label.configure(text=f"Current Session CPH: {cph}")
+        now = datetime.now()
+        self.cph_label.configure(text=f"Current Session CPH: {self.pace.session_cph(now)}")
+        projected = self.pace.projected_volume(now)
+        pace_text = f"Recent CPH: {self.pace.recent_cph(now)}"
+        if projected is not None:
+            pace_text += f" | Projected by shift end: {projected}"
+        self.pace_label.configure(text=pace_text)
         
         # Update KPM/CPM (Current Rolling / Session Average)
         curr_kpm = self.input_monitor.get_current_kpm()
@@ -232,9 +260,7 @@ class CPHTracker(ctk.CTkFrame):
     def count_down(self):
         if self.running:
             # Update elapsed time
-            if self.current_ticket_start_time:
-                elapsed = datetime.now() - self.current_ticket_start_time
-                self.elapsed_label.configure(text=f"Elapsed: {self.format_time(int(elapsed.total_seconds()))}")
+            self.elapsed_label.configure(text=f"Elapsed: {self.format_time(int(self.ticket_elapsed_seconds()))}")
 
             if self.remaining_seconds > 0:
                 self.remaining_seconds -= 1
@@ -23,6 +23,11 @@ class StatsView(ctk.CTkFrame):
         header.grid(row=0, column=0, sticky="ew", padx=20, pady=20)
         
         ctk.CTkLabel(header, text="Performance Analytics", font=("Roboto", 24, "bold"), text_color=THEME["text_primary"]).pack(side="left")
+
+        # Chart mode: daily trend line or weekday/hour heatmap
+        self.mode_var = ctk.StringVar(value="Trend")
+        self.mode_seg = ctk.CTkSegmentedButton(header, values=["Trend", "Heatmap"], variable=self.mode_var, command=self.on_filter_change)
+        self.mode_seg.pack(side="right")
         
         # --- Controls (Date Range & Metric) ---
         controls = ctk.CTkFrame(self, fg_color=THEME["bg_card"], corner_radius=10)
@@ -73,6 +78,9 @@ class StatsView(ctk.CTkFrame):
         self.card_vol = self.create_kpi_card(self.kpi_frame, "Volume", "0", 2)
         self.card_kpm = self.create_kpi_card(self.kpi_frame, "Avg KPM", "0.0", 3)
         self.card_cpm = self.create_kpi_card(self.kpi_frame, "Avg CPM", "0.0", 4)
+        self.card_p50 = self.create_kpi_card(self.kpi_frame, "Median Handle", "--", 0, row=1)
+        self.card_p90 = self.create_kpi_card(self.kpi_frame, "P90 Handle", "--", 1, row=1)
+        self.card_p99 = self.create_kpi_card(self.kpi_frame, "P99 Handle", "--", 2, row=1)
         
         # Graph (Bottom of content)
         self.graph_container = ctk.CTkFrame(self.content_frame, fg_color=THEME["bg_card"], corner_radius=10)
@@ -90,6 +98,7 @@ class StatsView(ctk.CTkFrame):
         self.fig.patch.set_facecolor(bg_color)
         self.ax.set_facecolor(bg_color)
         
+        self.colorbar = None
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.graph_container)
         self.canvas.get_tk_widget().pack(fill="both", expand=True, padx=10, pady=10)
         
@@ -105,6 +114,10 @@ class StatsView(ctk.CTkFrame):
         val_lbl.pack(pady=(0, 10))
         return val_lbl
 
+    def format_duration(self, seconds):
+        seconds = int(round(seconds))
+        return f"{seconds // 60}:{seconds % 60:02d}"
+
     def on_filter_change(self, _=None):
         self.refresh_stats()
 
@@ -120,34 +133,36 @@ class StatsView(ctk.CTkFrame):
         
         metric = self.metric_var.get()
         
-        # fetch data
-        stats = self.stats_manager.get_stats_range(s_date, e_date, period="day", metric=metric)
-        
-        # Also fetch summary stats for cards for this range
-        cph_data = self.stats_manager.get_stats_range(s_date, e_date, period="day", metric="cph")
-        aht_data = self.stats_manager.get_stats_range(s_date, e_date, period="day", metric="aht")
-        vol_data = self.stats_manager.get_stats_range(s_date, e_date, period="day", metric="volume")
-        kpm_data = self.stats_manager.get_stats_range(s_date, e_date, period="day", metric="kpm")
-        cpm_data = self.stats_manager.get_stats_range(s_date, e_date, period="day", metric="cpm")
+        # Fetch every metric for the range in one aggregation pass
+        table = self.stats_manager.get_stats_table(s_date, e_date, period="day")
+        stats = list(zip(table["labels"], table[metric]))
         
-        def avg(data):
-            vals = [v for _, v in data if v > 0]
+        def avg(values):
+            vals = [v for v in values if v > 0]
             if not vals: return 0.0
             return sum(vals) / len(vals)
 
-        def total(data):
-            return sum([v for _, v in data])
+        # Summary cards for this range
+        self.card_cph.configure(text=f"{avg(table['cph']):.1f}")
+        self.card_aht.configure(text=f"{avg(table['aht']):.1f}")
+        self.card_vol.configure(text=str(int(sum(table["volume"]))))
+        self.card_kpm.configure(text=f"{avg(table['kpm']):.0f}")
+        self.card_cpm.configure(text=f"{avg(table['cpm']):.0f}")
 
-        self.card_cph.configure(text=f"{avg(cph_data):.1f}")
-        self.card_aht.configure(text=f"{avg(aht_data):.1f}")
-        self.card_vol.configure(text=str(int(total(vol_data))))
-        self.card_kpm.configure(text=f"{avg(kpm_data):.0f}")
-        self.card_cpm.configure(text=f"{avg(cpm_data):.0f}")
+        # Handle-time distribution (m:ss) merged from the daily sketches
+        handle = self.stats_manager.get_handle_time_percentiles(s_date, e_date)
+        for card, key in ((self.card_p50, "p50"), (self.card_p90, "p90"), (self.card_p99, "p99")):
+            card.configure(text=self.format_duration(handle[key]) if handle["count"] else "--")
 
         # Update Plot
+        if self.colorbar is not None:
+            self.colorbar.remove()
+            self.colorbar = None
         self.ax.clear()
-        
-        if not stats:
+
+        if self.mode_var.get() == "Heatmap":
+            self.draw_heatmap(s_date, e_date, metric)
+        elif not stats:
             self.ax.text(0.5, 0.5, "No Data", ha='center', va='center', color='white')
         else:
             labels = [x[0] for x in stats]
@@ -161,7 +176,7 @@ class StatsView(ctk.CTkFrame):
             self.ax.fill_between(x_pos, values, alpha=0.3, color='#61afef')
             
             # Graphical Average Line
-            average_val = avg(stats)
+            average_val = avg(values)
             self.ax.axhline(y=average_val, color='#e06c75', linestyle='--', label=f'Avg: {average_val:.1f}')
             
             # Target Line
@@ -199,3 +214,26 @@ class StatsView(ctk.CTkFrame):
 
         self.canvas.draw()
 
+    def draw_heatmap(self, s_date, e_date, metric):
+        """Weekday x hour-of-day heatmap, rendered from the precomputed hour buckets."""
+        heatmap = self.stats_manager.get_hourly_heatmap(s_date, e_date, metric)
+        values = heatmap["values"]
+        if not any(any(row) for row in values):
+            self.ax.text(0.5, 0.5, "No Data", ha='center', va='center', color='white')
+            return
+
+        image = self.ax.imshow(values, aspect='auto', cmap='viridis', interpolation='nearest')
+        self.colorbar = self.fig.colorbar(image, ax=self.ax)
+        self.colorbar.ax.tick_params(colors='white')
+
+        self.ax.set_yticks(range(len(heatmap["weekdays"])))
+        self.ax.set_yticklabels(heatmap["weekdays"])
+        self.ax.set_xticks(heatmap["hours"])
+        self.ax.set_xticklabels([f"{h:02d}" for h in heatmap["hours"]])
+        self.ax.set_xlabel("Hour of day", color='white')
+        self.ax.set_title(f"{metric.upper()} by Weekday and Hour", color='white')
+        self.ax.tick_params(colors='white')
+        for spine in self.ax.spines.values():
+            spine.set_color('#444')
+        self.fig.tight_layout()
+